@@ -27,7 +27,7 @@ from rich.text import Text
 from slugify import slugify
 
 # Import existing extractor
-from extract_product_from_pptx import process_slide_two_steps, fetch_strapi_data
+from extract_product_from_pptx import process_slide_two_steps, fetch_strapi_data, configure_logging
 
 # Load environment variables
 load_dotenv()
@@ -557,6 +557,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Show the slide extractor's progress messages
+    configure_logging()
+    
     # Validate PowerPoint file
     if not os.path.exists(args.pptx):
         console.print(f"[red]PowerPoint file not found: {args.pptx}[/red]")
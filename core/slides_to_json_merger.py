@@ -16,7 +16,7 @@ from typing import Dict, List, Any, Optional
 
 try:
     from pptx import Presentation
-    from extractors.extract_product_from_pptx import process_slide_two_steps
+    from extractors.extract_product_from_pptx import configure_logging, process_slide_two_steps
 except ImportError:
     print("Error: python-pptx and extract_product_from_pptx required.")
     print("Install with: pip install python-pptx")
@@ -87,6 +87,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Show the slide extractor's progress messages
+    configure_logging()
+    
     # Validate input files
     pptx_path = Path(args.pptx)
     input_path = Path(args.input)
@@ -5,6 +5,8 @@ Test production Strapi connection and fetch current mappings
 import json
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,6 +15,14 @@ load_dotenv()
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 PRODUCTION_URL = "https://adminpanel.lets-med.com/api"
 
+# One session for every request so the TLS connection to production is reused
+SESSION = requests.Session()
+SESSION.headers.update({
+    "Authorization": f"Bearer {STRAPI_TOKEN}",
+    "Content-Type": "application/json"
+})
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
 def test_connection():
     """Test connection to production Strapi"""
     print("🔗 Testing connection to production Strapi...")
@@ -23,14 +33,9 @@ def test_connection():
         print("❌ STRAPI_TOKEN not found in .env file")
         return False
     
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     try:
         # Test basic connection
-        response = requests.get(f"{PRODUCTION_URL}/categories", headers=headers)
+        response = SESSION.get(f"{PRODUCTION_URL}/categories")
         print(f"Categories endpoint status: {response.status_code}")
         
         if response.status_code == 200:
@@ -49,23 +54,19 @@ def fetch_production_mappings():
     """Fetch current category and division mappings from production"""
     print("\n📊 Fetching production mappings...")
     
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    # Fetch categories
+    # The two requests are independent, so send them at the same time
     print("📋 Fetching categories...")
-    categories_response = requests.get(f"{PRODUCTION_URL}/categories?pagination[limit]=100", headers=headers)
+    print("🏢 Fetching divisions...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        categories_future = executor.submit(SESSION.get, f"{PRODUCTION_URL}/categories?pagination[limit]=100")
+        divisions_future = executor.submit(SESSION.get, f"{PRODUCTION_URL}/divisions?pagination[limit]=100")
+        categories_response = categories_future.result()
+        divisions_response = divisions_future.result()
     
     if categories_response.status_code != 200:
         print(f"❌ Failed to fetch categories: {categories_response.status_code}")
         return None, None
     
-    # Fetch divisions
-    print("🏢 Fetching divisions...")
-    divisions_response = requests.get(f"{PRODUCTION_URL}/divisions?pagination[limit]=100", headers=headers)
-    
     if divisions_response.status_code != 200:
         print(f"❌ Failed to fetch divisions: {divisions_response.status_code}")
         return None, None
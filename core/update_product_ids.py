@@ -2,20 +2,22 @@
 """
 Update category and division IDs in products.json to match production mappings
 """
-import json
+import argparse
 import os
-from typing import Dict, List, Any
+import shutil
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dump_file, load_file
 
 def load_mappings():
     """Load the updated category and division mappings"""
     print("📋 Loading updated mappings...")
     
     try:
-        with open('categories_map.json', 'r', encoding='utf-8') as f:
-            categories_map = json.load(f)
-        
-        with open('divisions_map.json', 'r', encoding='utf-8') as f:
-            divisions_map = json.load(f)
+        categories_map = load_file('categories_map.json')
+        divisions_map = load_file('divisions_map.json')
         
         print(f"✅ Loaded {len(categories_map)} categories and {len(divisions_map)} divisions")
         return categories_map, divisions_map
@@ -29,8 +31,7 @@ def load_products():
     print("📦 Loading products.json...")
     
     try:
-        with open('products.json', 'r', encoding='utf-8') as f:
-            products = json.load(f)
+        products = load_file('products.json')
         
         print(f"✅ Loaded {len(products)} products")
         return products
@@ -39,13 +40,26 @@ def load_products():
         print(f"❌ Error loading products: {e}")
         return None
 
-def update_product_ids(products: List[Dict], categories_map: Dict, divisions_map: Dict):
-    """Update category and division IDs in products"""
+def update_product_ids(products: List[Dict], categories_map: Dict, divisions_map: Dict, verbose: bool = False):
+    """
+    Update category and division IDs in products.
+    
+    Per-product details are only printed when verbose is set; problems are
+    always collected in the returned errors and listed in the summary.
+    """
     print("\n🔄 Updating product IDs...")
     
     updated_count = 0
     errors = []
     
+    # Bound once; the loop below runs for every product
+    cat_get = categories_map.get
+    div_get = divisions_map.get
+    
+    # Many products share the same divisionNames, so each distinct list is
+    # resolved once: tuple(names) -> (resolved IDs, names missing from the map)
+    resolved_divisions = {}
+    
     for i, product in enumerate(products):
         product_data = product.get('data', {})
         
@@ -55,40 +69,50 @@ def update_product_ids(products: List[Dict], categories_map: Dict, divisions_map
         category_name = product_data.get('categoryName', '')
         division_names = product_data.get('divisionNames', [])
         
-        print(f"\n📦 Product {i+1}: {product_data.get('name', 'Unknown')}")
-        print(f"   Current category ID: {current_category_id}")
-        print(f"   Current divisions: {current_divisions}")
+        if verbose:
+            print(f"\n📦 Product {i+1}: {product_data.get('name', 'Unknown')}")
+            print(f"   Current category ID: {current_category_id}")
+            print(f"   Current divisions: {current_divisions}")
         
         # Update category ID
-        if category_name and category_name in categories_map:
-            new_category_id = categories_map[category_name]
+        new_category_id = cat_get(category_name) if category_name else None
+        if new_category_id is not None:
             if current_category_id != new_category_id:
                 product_data['category'] = new_category_id
-                print(f"   ✅ Updated category: {current_category_id} → {new_category_id}")
+                if verbose:
+                    print(f"   ✅ Updated category: {current_category_id} → {new_category_id}")
                 updated_count += 1
-            else:
+            elif verbose:
                 print(f"   ✅ Category already correct: {current_category_id}")
         else:
-            print(f"   ⚠️  Category name not found in mapping: '{category_name}'")
+            if verbose:
+                print(f"   ⚠️  Category name not found in mapping: '{category_name}'")
             errors.append(f"Product {i+1}: Category '{category_name}' not found")
         
         # Update division IDs
         if division_names and isinstance(division_names, list):
-            new_divisions = []
-            for div_name in division_names:
-                if div_name in divisions_map:
-                    new_divisions.append(divisions_map[div_name])
-                else:
+            key = tuple(division_names)
+            resolved = resolved_divisions.get(key)
+            if resolved is None:
+                ids = tuple(div_id for div_name in key if (div_id := div_get(div_name)) is not None)
+                missing = tuple(div_name for div_name in key if div_get(div_name) is None) if len(ids) != len(key) else ()
+                resolved = resolved_divisions[key] = (ids, missing)
+            new_divisions, missing_divisions = resolved
+            for div_name in missing_divisions:
+                if verbose:
                     print(f"   ⚠️  Division name not found: '{div_name}'")
-                    errors.append(f"Product {i+1}: Division '{div_name}' not found")
+                errors.append(f"Product {i+1}: Division '{div_name}' not found")
             
             if new_divisions:
+                # A fresh list per product so products never share one object
+                new_divisions = list(new_divisions)
                 product_data['divisions'] = new_divisions
-                print(f"   ✅ Updated divisions: {current_divisions} → {new_divisions}")
+                if verbose:
+                    print(f"   ✅ Updated divisions: {current_divisions} → {new_divisions}")
                 updated_count += 1
-            else:
+            elif verbose:
                 print(f"   ⚠️  No valid divisions found")
-        else:
+        elif verbose:
             print(f"   ⚠️  No division names available")
     
     print(f"\n📊 Summary:")
@@ -98,8 +122,7 @@ def update_product_ids(products: List[Dict], categories_map: Dict, divisions_map
     
     if errors:
         print(f"\n❌ Errors found:")
-        for error in errors:
-            print(f"   - {error}")
+        print("\n".join(f"   - {error}" for error in errors))
     
     return products, updated_count, errors
 
@@ -108,19 +131,15 @@ def save_updated_products(products: List[Dict]):
     print("\n💾 Saving updated products...")
     
     try:
-        # Create backup
+        # Create backup; copyfile lets the kernel copy the bytes (sendfile on
+        # Linux) instead of decoding and re-encoding the whole file
         backup_filename = 'products_backup.json'
-        with open('products.json', 'r', encoding='utf-8') as f:
-            original_content = f.read()
-        
-        with open(backup_filename, 'w', encoding='utf-8') as f:
-            f.write(original_content)
+        shutil.copyfile('products.json', backup_filename)
         
         print(f"✅ Created backup: {backup_filename}")
         
         # Save updated products
-        with open('products.json', 'w', encoding='utf-8') as f:
-            json.dump(products, f, indent=2, ensure_ascii=False)
+        dump_file(products, 'products.json')
         
         print("✅ Updated products.json successfully")
         
@@ -131,6 +150,10 @@ def save_updated_products(products: List[Dict]):
     return True
 
 def main():
+    parser = argparse.ArgumentParser(description="Update category and division IDs in products.json")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Print the changes made to every product")
+    args = parser.parse_args()
+    
     print("🚀 Product ID Update Script")
     print("=" * 50)
     
@@ -147,7 +170,7 @@ def main():
         return
     
     # Update product IDs
-    updated_products, update_count, errors = update_product_ids(products, categories_map, divisions_map)
+    updated_products, update_count, errors = update_product_ids(products, categories_map, divisions_map, verbose=args.verbose)
     
     # Save updated products
     if save_updated_products(updated_products):
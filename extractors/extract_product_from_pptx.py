@@ -1,29 +1,60 @@
 from dotenv import load_dotenv
-import openai
+import hashlib
 import json
+import logging
 import os
-import requests
-from pptx import Presentation
+import re
 import sys
+import time
 import argparse
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from logging.handlers import MemoryHandler
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dump_file, dumps, load_file, loads
+
+log = logging.getLogger(__name__)
 
 # === Load .env ===
 load_dotenv()
-client = openai.OpenAI()  # Automatically reads API key from env
+client = None  # OpenAI client, created on first use by get_openai_client()
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
-print("strapi token", STRAPI_TOKEN)
+log.debug(f"strapi token set: {bool(STRAPI_TOKEN)}")
 STRAPI_URL   = "http://localhost:1337/api/medical-products"   # change host if needed
 
 # === CONFIGURATION ===
 PPTX_PATH = "../data/WEB MASTER Ver 9.pptx"
 OUTPUT_DIR = "products"
 MODEL = "gpt-4"  # or gpt-3.5-turbo
+TEMPERATURE = 0.3
+CACHE_DIR = Path.home() / ".cache" / "pptagent"  # Kept out of OUTPUT_DIR, whose *.json files get uploaded
+LLM_CACHE_DIR = CACHE_DIR / "openai"  # Responses keyed by model + prompt
+MAPS_CACHE_PATH = CACHE_DIR / "strapi_maps.json"
+SLIDE_CACHE_PATH = CACHE_DIR / "slide_content.json"
+USE_LLM_CACHE = True  # Disabled with --no-cache
+MAX_WORKERS = 8  # Slides sent to OpenAI concurrently; keep below the API rate limit
 POST_TO_STRAPI = True  # Set to True to actually post to Strapi, False to just preview
 DEFAULT_IMAGE_ID = 351  # Hardcoded image ID for placeholder
 HARDCODED_IMAGE_ID = 351  # Image ID to use when images array is empty
+MAPS_CACHE_TTL = 3600  # Seconds to reuse cached Strapi category/division maps
+STRAPI_TIMEOUT = 2.0  # Seconds to wait for Strapi before using the fallback maps
 # ======================
 
 # === COMMAND LINE ARGUMENT PARSING ===
+def positive_int(value):
+    """argparse type for 1-based slide numbers"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid slide number: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"slide number must be >= 1, got {number}")
+    return number
+
 def parse_arguments():
     """Parse command line arguments for slide range"""
     parser = argparse.ArgumentParser(
@@ -39,14 +70,14 @@ Examples:
     
     parser.add_argument(
         "--start", "-s",
-        type=int,
+        type=positive_int,
         required=True,
         help="Starting slide number (1-based)"
     )
     
     parser.add_argument(
         "--finish", "-f", 
-        type=int,
+        type=positive_int,
         required=True,
         help="Finishing slide number (1-based)"
     )
@@ -57,7 +88,23 @@ Examples:
         help="Skip updating products.json file"
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call OpenAI instead of reusing cached responses"
+    )
+    
+    parser.add_argument(
+        "--refresh-maps",
+        action="store_true",
+        help="Refetch category/division maps from Strapi instead of using the local cache"
+    )
+    
+    args = parser.parse_args()
+    # Reject bad ranges here, before the presentation is loaded
+    if args.finish < args.start:
+        parser.error(f"--finish {args.finish} must be >= --start {args.start}")
+    return args
 
 # === TASK PLAN ===
 """
@@ -102,56 +149,47 @@ F) COMPLETENESS LOGGING
 
 # === STUB FUNCTIONS (NOT YET INTEGRATED) ===
 
-def extract_table_md(slide):
+# Clark-notation tag of <a:tbl>, i.e. qn("a:tbl"), spelled out so pptx is not imported at module load
+_A_TBL = "{http://schemas.openxmlformats.org/drawingml/2006/main}tbl"
+
+def slide_has_table(slide):
+    """Check the slide XML for a table in one lxml search instead of asking every shape"""
+    return slide.shapes._spTree.find(".//" + _A_TBL) is not None
+
+# Escape pipes and flatten line breaks so a cell cannot break its Markdown row
+_PIPE_ESC = str.maketrans({"|": "\\|", "\n": " ", "\v": " "})
+
+def table_to_md(table):
     """
-    Extract table from slide and convert to Markdown format.
+    Convert a python-pptx table to Markdown format.
     
     Args:
-        slide: pptx.slide.Slide object
+        table: pptx.table.Table object
         
     Returns:
-        str: Markdown table string or empty string if no table found
+        str: Markdown table string or empty string if the table has no data
     """
-    print("🔍 Searching for tables in slide...")
+    # Extract table data
+    rows = []
+    for row in table.rows:
+        row_data = []
+        for cell in row.cells:
+            # Get cell text, escaped for Markdown in a single pass
+            row_data.append(cell.text.translate(_PIPE_ESC).strip())
+        rows.append(row_data)
     
-    for shape in slide.shapes:
-        if shape.has_table:
-            print("📊 Found table, converting to Markdown...")
-            table = shape.table
-            
-            # Extract table data
-            rows = []
-            for row in table.rows:
-                row_data = []
-                for cell in row.cells:
-                    # Get cell text and clean it
-                    cell_text = cell.text.strip()
-                    # Replace pipe characters to avoid breaking markdown
-                    cell_text = cell_text.replace('|', '\\|')
-                    row_data.append(cell_text)
-                rows.append(row_data)
-            
-            if not rows:
-                print("⚠️ Table found but no data extracted")
-                return ""
-            
-            # Convert to Markdown format
-            markdown_table = ""
-            
-            # Add header row
-            if rows:
-                markdown_table += "| " + " | ".join(rows[0]) + " |\n"
-                # Add separator row
-                markdown_table += "|" + "|".join(["---"] * len(rows[0])) + "|\n"
-                # Add data rows
-                for row in rows[1:]:
-                    markdown_table += "| " + " | ".join(row) + " |\n"
-            
-            print(f"✅ Converted table with {len(rows)} rows to Markdown")
-            return markdown_table.strip()
+    if not rows:
+        log.warning("⚠️ Table found but no data extracted")
+        return ""
+    
+    # Header row, separator row, then data rows, joined once
+    lines = ["| " + " | ".join(rows[0]) + " |"]
+    lines.append("|" + "|".join(["---"] * len(rows[0])) + "|")
+    lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+    markdown_table = "\n".join(lines)
     
-    print("❌ No table found in slide")
-    return ""
+    log.info(f"✅ Converted table with {len(rows)} rows to Markdown")
+    return markdown_table
 
 def format_description(raw_sections_dict):
     """
@@ -163,22 +201,25 @@ def format_description(raw_sections_dict):
     Returns:
         str: Properly formatted Markdown string with ## headings and bullets
     """
-    print("📝 Formatting description with Markdown structure...")
+    log.info("📝 Formatting description with Markdown structure...")
     
     # TODO: Parse raw sections
     # TODO: Add ## headings for each section
     # TODO: Convert bullet points to proper Markdown
     # TODO: Handle missing sections gracefully
     
-    formatted_md = ""
+    lines = []
     for section_name, bullet_points in raw_sections_dict.items():
-        formatted_md += f"## {section_name}\n"
-        for point in bullet_points:
-            formatted_md += f"- {point}\n"
-        formatted_md += "\n"
+        lines.append(f"## {section_name}")
+        lines.extend(f"- {point}" for point in bullet_points)
+        lines.append("")
     
-    return formatted_md.strip()
+    return "\n".join(lines).strip()
 
+# The common "4.1.1" shape: three numeric segments
+_REF_RE = re.compile(r"^(\d+)\.(\d+)\.(\d+)$")
+
+@lru_cache(maxsize=1024)
 def pad_reference_string(reference_string):
     """
     Pad referenceString to ensure middle segment has 2 digits.
@@ -189,7 +230,7 @@ def pad_reference_string(reference_string):
     Returns:
         str: Padded reference string like "4.01.1"
     """
-    print(f"🔢 Padding reference string: {reference_string}")
+    log.info(f"🔢 Padding reference string: {reference_string}")
     
     # TODO: Parse reference string by dots
     # TODO: Zero-pad middle segment if needed
@@ -198,6 +239,12 @@ def pad_reference_string(reference_string):
     if not reference_string:
         return ""
     
+    match = _REF_RE.match(reference_string)
+    if match:
+        major, middle, minor = match.groups()
+        return f"{major}.{middle.zfill(2)}.{minor}"
+    
+    # Anything else (extra segments, non-numeric parts) keeps the generic handling
     parts = reference_string.split('.')
     if len(parts) >= 3:
         # Ensure middle segment has 2 digits
@@ -216,16 +263,32 @@ def ensure_images_array(payload_data):
     Returns:
         dict: Updated payload with images array populated if needed
     """
-    print("🖼️ Checking images array...")
+    log.info("🖼️ Checking images array...")
     
     if "images" not in payload_data or not payload_data["images"]:
-        print(f"✅ Adding HARDCODED_IMAGE_ID ({HARDCODED_IMAGE_ID}) to images array")
+        log.info(f"✅ Adding HARDCODED_IMAGE_ID ({HARDCODED_IMAGE_ID}) to images array")
         payload_data["images"] = [HARDCODED_IMAGE_ID]
     else:
-        print(f"✅ Images array already populated with {len(payload_data['images'])} items")
+        log.info(f"✅ Images array already populated with {len(payload_data['images'])} items")
     
     return payload_data
 
+# Field requirements checked by generate_completeness_log(), as (field, description) pairs
+REQUIRED_FIELDS = (
+    ("name", "Product name"),
+    ("referenceString", "Product reference code"),
+    ("images", "Images array"),
+)
+
+OPTIONAL_FIELDS = (
+    ("standard", "Manufacturing standard"),
+    ("description", "Product description (markdown)"),
+    ("tableInMd", "Technical specifications table"),
+    ("category", "Product category ID"),
+    ("divisions", "Product division IDs"),
+    ("PackagingInformation", "Packaging component"),
+)
+
 def generate_completeness_log(payload_data):
     """
     Generate completeness log with ✅/❌ indicators for each field.
@@ -236,47 +299,30 @@ def generate_completeness_log(payload_data):
     Returns:
         dict: Field status with completion indicators
     """
-    print("📋 Generating completeness log...")
+    log.info("📋 Generating completeness log...")
     
     completeness_log = {}
     
-    # Define field requirements
-    required_fields = {
-        "name": "Product name",
-        "referenceString": "Product reference code",
-        "images": "Images array"
-    }
-    
-    optional_fields = {
-        "standard": "Manufacturing standard",
-        "description": "Product description (markdown)",
-        "tableInMd": "Technical specifications table",
-        "category": "Product category ID",
-        "divisions": "Product division IDs",
-        "PackagingInformation": "Packaging component"
-    }
-    
     # Check required fields
-    for field, description in required_fields.items():
-        if field in payload_data and payload_data[field]:
-            if field == "images" and len(payload_data[field]) > 0:
-                completeness_log[field] = ("✅", f"{description} - {len(payload_data[field])} image(s)")
+    for field, description in REQUIRED_FIELDS:
+        val = payload_data.get(field)
+        if val:
+            if field == "images":
+                completeness_log[field] = ("✅", f"{description} - {len(val)} image(s)")
             else:
                 completeness_log[field] = ("✅", f"{description} - populated")
         else:
             completeness_log[field] = ("❌", f"{description} - missing or empty")
     
     # Check optional fields
-    for field, description in optional_fields.items():
-        if field in payload_data and payload_data[field]:
+    for field, description in OPTIONAL_FIELDS:
+        val = payload_data.get(field)
+        if val:
             if field == "description":
-                preview = payload_data[field][:50] + "..." if len(payload_data[field]) > 50 else payload_data[field]
+                preview = val[:50] + "..." if len(val) > 50 else val
                 completeness_log[field] = ("✅", f"{description} - \"{preview}\"")
             elif field == "tableInMd":
-                if payload_data[field]:
-                    completeness_log[field] = ("✅", f"{description} - table present")
-                else:
-                    completeness_log[field] = ("❌", f"{description} - empty")
+                completeness_log[field] = ("✅", f"{description} - table present")
             else:
                 completeness_log[field] = ("✅", f"{description} - populated")
         else:
@@ -291,44 +337,54 @@ def print_completeness_log(completeness_log):
     Args:
         completeness_log: dict from generate_completeness_log()
     """
-    print("\n📊 COMPLETENESS REPORT:")
-    print("=" * 50)
+    log.info("\n📊 COMPLETENESS REPORT:")
+    log.info("=" * 50)
     
     for field, (status, description) in completeness_log.items():
-        print(f"{status} {field}: {description}")
+        log.info(f"{status} {field}: {description}")
     
     # Summary
     total_fields = len(completeness_log)
     completed_fields = sum(1 for status, _ in completeness_log.values() if status == "✅")
     completion_rate = (completed_fields / total_fields) * 100
     
-    print("=" * 50)
-    print(f"📈 Completion Rate: {completed_fields}/{total_fields} ({completion_rate:.1f}%)")
+    log.info("=" * 50)
+    log.info(f"📈 Completion Rate: {completed_fields}/{total_fields} ({completion_rate:.1f}%)")
     
     if completion_rate < 80:
-        print("⚠️  Warning: Low completion rate - consider manual review")
+        log.warning("⚠️  Warning: Low completion rate - consider manual review")
     elif completion_rate == 100:
-        print("🎉 Perfect! All fields completed successfully")
+        log.info("🎉 Perfect! All fields completed successfully")
     else:
-        print("✅ Good completion rate")
+        log.info("✅ Good completion rate")
 
 # === END STUB FUNCTIONS ===
 
 def fetch_strapi_data():
     """Fetch real category and division IDs from Strapi API"""
-    print("🔄 Fetching category and division data from Strapi...")
+    import requests
+    from requests.adapters import HTTPAdapter
     
-    # Fetch categories
-    categories_response = requests.get("http://localhost:1337/api/categories?pagination[limit]=100")
-    if categories_response.status_code != 200:
-        print("❌ Failed to fetch categories:", categories_response.status_code)
-        return None, None
+    log.info("🔄 Fetching category and division data from Strapi...")
     
-    # Fetch divisions
-    divisions_response = requests.get("http://localhost:1337/api/divisions?pagination[limit]=100")
-    if divisions_response.status_code != 200:
-        print("❌ Failed to fetch divisions:", divisions_response.status_code)
-        return None, None
+    # One session so both requests reuse the same connection
+    with requests.Session() as session:
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        try:
+            # Fetch categories
+            categories_response = session.get("http://localhost:1337/api/categories?pagination[limit]=100", timeout=STRAPI_TIMEOUT)
+            if categories_response.status_code != 200:
+                log.error(f"❌ Failed to fetch categories: {categories_response.status_code}")
+                return None, None
+            
+            # Fetch divisions
+            divisions_response = session.get("http://localhost:1337/api/divisions?pagination[limit]=100", timeout=STRAPI_TIMEOUT)
+            if divisions_response.status_code != 200:
+                log.error(f"❌ Failed to fetch divisions: {divisions_response.status_code}")
+                return None, None
+        except requests.RequestException as e:
+            log.error(f"❌ Could not reach Strapi: {e}")
+            return None, None
     
     # Parse categories
     categories_data = categories_response.json()
@@ -342,71 +398,169 @@ def fetch_strapi_data():
     for division in divisions_data.get("data", []):
         division_map[division["attributes"]["name"]] = division["id"]
     
-    print(f"✅ Fetched {len(category_map)} categories and {len(division_map)} divisions")
+    log.info(f"✅ Fetched {len(category_map)} categories and {len(division_map)} divisions")
     return category_map, division_map
 
-# Fetch real data from Strapi
-category_map, division_map = fetch_strapi_data()
-
-# Fallback to hardcoded values if API fails
-if not category_map:
-    print("⚠️ Using fallback category map")
-    category_map = {
-        "Syringes": 59,
-        "Needles": 60,
-        "Condoms": 58,
-        "Scalp vein sets": 61,
-        "Blood lancets": 62,
-        "Infusion Sets": 63,
-        "Infusion Accessories": 64,
-        "Transfusion Sets": 65,
-        "Extension Tubes": 66,
-        "IV CANNULA": 67,
-        "Electrodes": 68,
-        "Gloves": 69,
-        "Adhesive tapes & dressings": 70,
-        "Gauze": 71,
-        "Disposable Non-Woven Gourments": 72,
-        "Suction Catheter": 73,
-        "Urinary Catheters": 74,
-        "Enteral Feeding Tubes": 75,
-        "Hemodialysis Catheters": 76
-    }
+# Fallback values used when the Strapi API is unreachable
+FALLBACK_CATEGORY_MAP = {
+    "Syringes": 59,
+    "Needles": 60,
+    "Condoms": 58,
+    "Scalp vein sets": 61,
+    "Blood lancets": 62,
+    "Infusion Sets": 63,
+    "Infusion Accessories": 64,
+    "Transfusion Sets": 65,
+    "Extension Tubes": 66,
+    "IV CANNULA": 67,
+    "Electrodes": 68,
+    "Gloves": 69,
+    "Adhesive tapes & dressings": 70,
+    "Gauze": 71,
+    "Disposable Non-Woven Gourments": 72,
+    "Suction Catheter": 73,
+    "Urinary Catheters": 74,
+    "Enteral Feeding Tubes": 75,
+    "Hemodialysis Catheters": 76
+}
 
-if not division_map:
-    print("⚠️ Using fallback division map")
-    division_map = {
-        "Infusion": 47,
-        "Injectables": 48,
-        "Diabetis care": 49,
-        "Diagnostic": 50,
-        "Hemodialysis": 51,
-        "Nutrition": 52,
-        "Urology": 53,
-        "Wound management": 54,
-        "Ortopedic": 55,
-        "Protection": 56,
-        "Measurement devices": 57,
-        "Anesthesia / Respiratory": 58,
-        "Surgery": 59,
-        "Safety devices": 60,
-    }
+FALLBACK_DIVISION_MAP = {
+    "Infusion": 47,
+    "Injectables": 48,
+    "Diabetis care": 49,
+    "Diagnostic": 50,
+    "Hemodialysis": 51,
+    "Nutrition": 52,
+    "Urology": 53,
+    "Wound management": 54,
+    "Ortopedic": 55,
+    "Protection": 56,
+    "Measurement devices": 57,
+    "Anesthesia / Respiratory": 58,
+    "Surgery": 59,
+    "Safety devices": 60,
+}
 
-def extract_text_from_slide(prs, slide_index):
-    """Extract all text from a slide"""
-    print(f"📄 Extracting text from slide {slide_index + 1}...")
-    slide = prs.slides[slide_index]
-    text = []
+# (category_map, division_map) resolved by get_maps() in this process
+_process_maps = None
+
+def get_maps(refresh=False):
+    """
+    Return (category_map, division_map), reusing a local cache between runs.
+    
+    The maps fetched from Strapi are cached in MAPS_CACHE_PATH and
+    reused for MAPS_CACHE_TTL seconds, so repeated runs skip both HTTP requests.
+    Within a process the first result is reused, fallback maps included, so
+    callers that process slide after slide while Strapi is down do not wait
+    for a fetch timeout on every slide.
+    
+    Args:
+        refresh: ignore the cache and fetch from Strapi
+        
+    Returns:
+        tuple: (category name -> id, division name -> id)
+    """
+    global _process_maps
+    if not refresh and _process_maps is not None:
+        return _process_maps
+    
+    cache_path = MAPS_CACHE_PATH
+    if not refresh and cache_path.exists() and time.time() - cache_path.stat().st_mtime < MAPS_CACHE_TTL:
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            log.info(f"✅ Using cached category and division data from {cache_path}")
+            _process_maps = cached["categories"], cached["divisions"]
+            return _process_maps
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"⚠️ Ignoring unreadable maps cache {cache_path}: {e}")
+    
+    # Fetch real data from Strapi
+    fetched_categories, fetched_divisions = fetch_strapi_data()
+    
+    if fetched_categories and fetched_divisions:
+        # Write to a temporary file first so a crash never leaves a truncated cache
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"categories": fetched_categories, "divisions": fetched_divisions}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    
+    # Fallback to hardcoded values if API fails
+    if not fetched_categories:
+        log.warning("⚠️ Using fallback category map")
+        fetched_categories = dict(FALLBACK_CATEGORY_MAP)
+    
+    if not fetched_divisions:
+        log.warning("⚠️ Using fallback division map")
+        fetched_divisions = dict(FALLBACK_DIVISION_MAP)
+    
+    _process_maps = fetched_categories, fetched_divisions
+    return _process_maps
+
+def extract_slide_payload(slide):
+    """
+    Extract text and the first table from a slide in a single pass over its shapes.
+    
+    Args:
+        slide: pptx.slide.Slide object
+        
+    Returns:
+        tuple: (slide text joined by newlines, Markdown table or empty string)
+    """
+    log.info("📄 Extracting text and table data from slide...")
+    text_parts = []
+    table_md = ""
+    # Most slides have no table; skip the per-shape has_table checks for those
+    want_table = slide_has_table(slide)
     for shape in slide.shapes:
         if shape.has_text_frame:
-            text.append(shape.text.strip())
-    extracted_text = "\n".join(text)
-    print(f"✅ Extracted {len(extracted_text)} characters from slide")
-    return extracted_text
+            text_parts.append(shape.text.strip())
+        elif want_table and not table_md and shape.has_table:
+            log.info("📊 Found table, converting to Markdown...")
+            table_md = table_to_md(shape.table)
+    extracted_text = "\n".join(text_parts)
+    log.info(f"✅ Extracted {len(extracted_text)} characters from slide")
+    return extracted_text, table_md
 
-def build_step1_prompt(slide_text):
-    """Build prompt for step 1: General product information"""
-    return f"""
+def load_slide_cache(pptx_path):
+    """
+    Load the extracted slide contents saved by a previous run on the same file.
+    
+    Parsed python-pptx objects wrap lxml elements and cannot be pickled, so the
+    cache holds what this script actually needs from the deck: the slide count
+    and each slide's (text, table_md). It is keyed by the file's path, size and
+    mtime, so editing the presentation invalidates it.
+    
+    Args:
+        pptx_path: path of the presentation
+        
+    Returns:
+        dict: {"key", "n_slides", "slides": {"<index>": [text, table_md]}}; empty for a new or changed file
+    """
+    stat = os.stat(pptx_path)
+    key = f"{os.path.abspath(pptx_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    cache_path = SLIDE_CACHE_PATH
+    if cache_path.exists():
+        try:
+            cached = load_file(cache_path)
+            if cached.get("key") == key:
+                return cached
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠️ Ignoring unreadable slide cache {cache_path}: {e}")
+    return {"key": key, "n_slides": None, "slides": {}}
+
+def save_slide_cache(cache):
+    """Write the slide content cache atomically"""
+    cache_path = SLIDE_CACHE_PATH
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+# Prompt templates; literal JSON braces are doubled for str.format_map
+STEP1_TEMPLATE = """
 Extract general product information from this slide and return ONLY this JSON format:
 
 {{
@@ -420,8 +574,8 @@ Extract general product information from this slide and return ONLY this JSON fo
                              ★ 
                              ★ ## STERILIZATION
                              ★ - Ethylene Oxide (EO) Sterile
-  "categoryGuess": "",       ★ Choose ONE from {list(category_map.keys())}
-  "divisionGuess": ""        ★ Choose ONE from {list(division_map.keys())}
+  "categoryGuess": "",       ★ Choose ONE from {category_keys}
+  "divisionGuess": ""        ★ Choose ONE from {division_keys}
 }}
 
 IMPORTANT: For the description field, format each section with ## headers and - bullet points exactly as shown in the example above.
@@ -433,9 +587,7 @@ Return ONLY the JSON.
 --- End ---
 """
 
-def build_step2_prompt(slide_text):
-    """Build prompt for step 2: Packaging information"""
-    return f"""
+STEP2_TEMPLATE = """
 Extract packaging information from this slide and return ONLY this JSON format:
 
 {{
@@ -458,26 +610,99 @@ Return ONLY the JSON.
 --- End ---
 """
 
+# Each template is rendered ahead of time into the static text before and after
+# {slide_text}, so building a prompt is a plain concatenation with the slide text
+_STEP2_HEAD, _STEP2_TAIL = (part.format() for part in STEP2_TEMPLATE.split("{slide_text}"))
+
+# (category_map, division_map, (head, tail)) for the maps last passed to build_step1_prompt
+_step1_parts = None
+
+def _step1_prompt_parts(category_map, division_map):
+    """Render the category/division choices once per pair of maps instead of once per slide"""
+    global _step1_parts
+    if _step1_parts is None or _step1_parts[0] is not category_map or _step1_parts[1] is not division_map:
+        key_fields = {
+            "category_keys": repr(list(category_map)),
+            "division_keys": repr(list(division_map)),
+        }
+        head, tail = STEP1_TEMPLATE.split("{slide_text}")
+        _step1_parts = (category_map, division_map, (head.format_map(key_fields), tail.format_map(key_fields)))
+    return _step1_parts[2]
+
+def build_step1_prompt(slide_text, category_map, division_map):
+    """Build prompt for step 1: General product information"""
+    head, tail = _step1_prompt_parts(category_map, division_map)
+    return head + slide_text + tail
+
+def build_step2_prompt(slide_text):
+    """Build prompt for step 2: Packaging information"""
+    return _STEP2_HEAD + slide_text + _STEP2_TAIL
+
+def get_openai_client():
+    """Create the OpenAI client on first use so importing this module stays cheap"""
+    global client
+    if client is None:
+        import openai
+        client = openai.OpenAI()  # Automatically reads API key from env
+    return client
+
 def call_openai(prompt, step_name):
-    """Call OpenAI API with logging"""
-    print(f"🔁 Step {step_name}: Sending request to OpenAI...")
-    response = client.chat.completions.create(
+    """
+    Call OpenAI API with logging and return the parsed JSON response.
+    
+    Responses are cached on disk under LLM_CACHE_DIR, keyed by a hash of the
+    model, temperature and prompt, so re-running the same slides skips the API.
+    A response is only cached once it parses, so a bad reply is re-requested
+    on the next run instead of being replayed from the cache.
+    """
+    key = hashlib.sha256(f"{MODEL}|{TEMPERATURE}|{prompt}".encode("utf-8")).hexdigest()
+    cache_path = LLM_CACHE_DIR / f"{key}.json"
+    if USE_LLM_CACHE and cache_path.exists():
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = _parse_llm_json(json.load(f)["content"])
+            log.info(f"✅ Step {step_name}: Using cached OpenAI response.")
+            return data
+        except (OSError, ValueError, KeyError) as e:
+            log.warning(f"⚠️ Step {step_name}: Ignoring unreadable cache entry {cache_path}: {e}")
+    
+    log.info(f"🔁 Step {step_name}: Sending request to OpenAI...")
+    response = get_openai_client().chat.completions.create(
         model=MODEL,
         messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
+        temperature=TEMPERATURE
     )
-    print(f"✅ Step {step_name}: Received response from OpenAI.")
-    return response.choices[0].message.content
-
-def merge_step_results(step1_result, step2_result):
-    """Merge results from both steps into final Strapi format"""
-    print("🔄 Merging step results...")
+    log.info(f"✅ Step {step_name}: Received response from OpenAI.")
+    content = response.choices[0].message.content
+    data = _parse_llm_json(content)
     
-    # Extract data from step 1
-    step1_data = json.loads(step1_result)
+    if USE_LLM_CACHE:
+        LLM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": MODEL, "prompt": prompt, "content": content}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return data
+
+def _parse_llm_json(content):
+    """
+    Parse JSON returned by the model, tolerating a surrounding markdown code fence.
     
-    # Extract data from step 2
-    step2_data = json.loads(step2_result)
+    Args:
+        content: raw message content, e.g. '```json\n{...}\n```'
+        
+    Returns:
+        dict: parsed JSON object
+    """
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("```", 2)[1]
+        content = content.removeprefix("json").strip()
+    return loads(content)
+
+def merge_step_results(step1_data, step2_data, category_map, division_map):
+    """Merge the parsed results from both steps into final Strapi format"""
+    log.info("🔄 Merging step results...")
     
     # Build final payload
     final_payload = {
@@ -494,159 +719,344 @@ def merge_step_results(step1_result, step2_result):
         }
     }
     
-    print("✅ Results merged successfully")
+    log.info("✅ Results merged successfully")
     return final_payload
 
+def slide_json_path(slide_index):
+    """Path of the per-slide payload file for a 0-based slide index"""
+    return os.path.join(OUTPUT_DIR, f"slide_{slide_index + 1}_strapi_format.json")
+
 def save_json(payload, slide_index):
     """Save the final payload to a JSON file"""
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Create filename based on slide number
-    filename = os.path.join(OUTPUT_DIR, f"slide_{slide_index + 1}_strapi_format.json")
+    filename = slide_json_path(slide_index)
     
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2, ensure_ascii=False)
+    dump_file(payload, filename)
     
-    print(f"📁 Saved to {filename}")
+    log.info(f"📁 Saved to {filename}")
     return filename
 
-def process_slide_two_steps(prs, slide_index):
+def process_slide_two_steps(prs, slide_index, category_map=None, division_map=None):
     """Process a slide using the two-step approach"""
-    print(f"\n🎯 Processing slide {slide_index + 1} using two-step extraction...")
+    log.info(f"\n🎯 Processing slide {slide_index + 1} using two-step extraction...")
     
-    # Get the slide object for table extraction
-    slide = prs.slides[slide_index]
+    if category_map is None or division_map is None:
+        category_map, division_map = get_maps()
     
-    # Step 1: Extract general product information using GPT-4
-    print("\n📋 STEP 1: Extracting general product information...")
-    slide_text = extract_text_from_slide(prs, slide_index)
-    step1_prompt = build_step1_prompt(slide_text)
-    step1_result = call_openai(step1_prompt, "1")
-    print("✅ Step 1 completed")
+    # Get the slide object for text and table extraction
+    slide = prs.slides[slide_index]
     
-    # Step 2: Extract packaging information using GPT-4 and table using python-pptx
-    print("\n📊 STEP 2: Extracting packaging information and table data...")
+    # Walk the slide once for both the text (GPT input) and the table (python-pptx)
+    slide_text, table_md = extract_slide_payload(slide)
     
-    # Extract table using python-pptx
-    table_md = extract_table_md(slide)
+    return process_slide_content(slide_index, slide_text, table_md, category_map, division_map)
+
+def process_slide_content(slide_index, slide_text, table_md, category_map, division_map):
+    """
+    Run the two GPT steps for already-extracted slide content and save the payload.
     
-    # Extract packaging information using GPT-4
+    Only touches plain strings, so it can run in a worker thread while python-pptx
+    access stays on the main thread.
+    """
+    # The two GPT steps are independent: send step 2 from a helper thread while
+    # step 1 runs here, so a slide costs one round-trip of wall time instead of two
+    step1_prompt = build_step1_prompt(slide_text, category_map, division_map)
     step2_prompt = build_step2_prompt(slide_text)
-    step2_result = call_openai(step2_prompt, "2")
-    print("✅ Step 2 completed")
+    with ThreadPoolExecutor(max_workers=1) as step2_executor:
+        # Step 2: Extract packaging information using GPT-4 (the table comes from python-pptx)
+        log.info("\n📊 STEP 2: Extracting packaging information and table data...")
+        # Run it in a copy of this context so its messages stay with this slide
+        step2_future = step2_executor.submit(contextvars.copy_context().run, call_openai, step2_prompt, "2")
+        
+        # Step 1: Extract general product information using GPT-4
+        log.info("\n📋 STEP 1: Extracting general product information...")
+        step1_data = call_openai(step1_prompt, "1")
+        log.info("✅ Step 1 completed")
+        
+        step2_data = step2_future.result()
+        log.info("✅ Step 2 completed")
     
-    # Parse step 2 result and replace tableInMd with actual extracted table
-    step2_data = json.loads(step2_result)
+    # Replace tableInMd with actual extracted table
     if table_md:
         step2_data["tableInMd"] = table_md
-        print("✅ Replaced GPT-extracted table with actual table data")
+        log.info("✅ Replaced GPT-extracted table with actual table data")
     
     # Merge results
-    final_payload = merge_step_results(step1_result, json.dumps(step2_data))
+    final_payload = merge_step_results(step1_data, step2_data, category_map, division_map)
     
     # Save to file
     filename = save_json(final_payload, slide_index)
     
     # Display results
-    print(f"\n📊 Final payload for slide {slide_index + 1}:")
-    print(json.dumps(final_payload, indent=2))
+    log.info(f"\n📊 Final payload for slide {slide_index + 1}:")
+    log.info(json.dumps(final_payload, indent=2))
     
     return final_payload
 
-def update_products_json(slide_payloads, products_json_path="../products.json"):
-    """Update products.json with extracted slide data."""
-    print(f"\n🔄 Updating {products_json_path} with extracted slide data...")
-    try:
-        with open(products_json_path, "r", encoding="utf-8") as f:
-            products = json.load(f)
-    except Exception as e:
-        print(f"❌ Could not load {products_json_path}: {e}")
-        return
+def iter_slide_payloads(slide_indices):
+    """Yield the saved payloads for the given slides, reading one file at a time"""
+    for slide_index in slide_indices:
+        yield load_file(slide_json_path(slide_index))
+
+class JsonArrayWriter:
+    """Write a JSON array to a file one element at a time instead of holding it in memory"""
+    
+    def __init__(self, filename):
+        self.filename = filename
+        self.count = 0
+        self._file = None
+    
+    def write(self, item):
+        """Append one element, creating the file on the first call"""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.filename) or ".", exist_ok=True)
+            self._file = open(self.filename, "wb")
+            self._file.write(b"[\n")
+        else:
+            self._file.write(b",\n")
+        self._file.write(dumps(item, indent=True))
+        self.count += 1
+    
+    def close(self):
+        """Terminate the array; nothing is written if no element was added"""
+        if self._file is not None:
+            self._file.write(b"\n]\n")
+            self._file.close()
+            self._file = None
+
+# Fields copied from slide payloads into products.json, and placeholder values that never overwrite
+PRODUCT_UPDATE_FIELDS = ("description", "standard", "tableInMd", "PackagingInformation")
+PLACEHOLDER_VALUES = frozenset({"???", "??????????", ""})
+
+@lru_cache(maxsize=1)
+def load_products_once(products_json_path="../products.json"):
+    """
+    Parse products.json once per process so driver scripts and update_products_json share it.
+    
+    The returned list is shared; update_products_json() updates it in place.
+    """
+    return load_file(products_json_path)
+
+def index_by_ref(products):
+    """Map referenceString -> product entry so each slide is matched with a dict lookup"""
+    return {p["data"]["referenceString"]: p for p in products}
+
+def update_products_json(slide_payloads, products_json_path="../products.json", products=None, ref_to_product=None):
+    """
+    Update products.json with extracted slide data.
+    
+    Args:
+        slide_payloads: iterable of slide payload dicts
+        products_json_path: file to update
+        products: products already loaded from products_json_path, e.g. by load_products_once(); read from disk if None
+        ref_to_product: index_by_ref(products) if the caller already built it
+    """
+    log.info(f"\n🔄 Updating {products_json_path} with extracted slide data...")
+    if products is None:
+        try:
+            products = load_file(products_json_path)
+        except Exception as e:
+            log.error(f"❌ Could not load {products_json_path}: {e}")
+            return
+    if ref_to_product is None:
+        ref_to_product = index_by_ref(products)
 
-    ref_to_product = {p["data"]["referenceString"]: p for p in products}
     updated_count = 0
     for payload in slide_payloads:
-        ref = payload["data"].get("referenceString")
+        new_data = payload["data"]
+        ref = new_data.get("referenceString")
         if not ref:
-            print(f"⚠️  No referenceString in slide payload, skipping.")
+            log.warning(f"⚠️  No referenceString in slide payload, skipping.")
             continue
         if ref not in ref_to_product:
-            print(f"⚠️  No matching product for referenceString {ref}, skipping.")
+            log.warning(f"⚠️  No matching product for referenceString {ref}, skipping.")
             continue
         prod = ref_to_product[ref]["data"]
-        for key in ["description", "standard", "tableInMd", "PackagingInformation"]:
-            new_val = payload["data"].get(key)
-            if new_val and new_val != "???" and new_val != "??????????":
-                prod[key] = new_val
+        for key in PRODUCT_UPDATE_FIELDS:
+            new_val = new_data.get(key)
+            if not new_val:
+                continue
+            # PackagingInformation is a dict, so only strings are checked against the placeholders
+            if isinstance(new_val, str) and new_val in PLACEHOLDER_VALUES:
+                continue
+            prod[key] = new_val
         updated_count += 1
-        print(f"✅ Updated product {prod['name']} (Ref: {ref})")
-    # Write back to file
-    with open(products_json_path, "w", encoding="utf-8") as f:
-        json.dump(products, f, indent=2, ensure_ascii=False)
-    print(f"\n✅ Updated {updated_count} products in {products_json_path}")
+        log.info(f"✅ Updated product {prod['name']} (Ref: {ref})")
+    if updated_count == 0:
+        log.info(f"\n⏭️  No products updated, leaving {products_json_path} untouched")
+        return
+    # Write back to file via a temporary file so a crash cannot truncate products.json
+    tmp_path = f"{products_json_path}.tmp"
+    dump_file(products, tmp_path)
+    os.replace(tmp_path, products_json_path)
+    log.info(f"\n✅ Updated {updated_count} products in {products_json_path}")
+
+# Records logged while a slide is processed in a worker thread; None outside _capture_logs
+_slide_records = contextvars.ContextVar("_slide_records", default=None)
+
+class _SlideBufferHandler(MemoryHandler):
+    """MemoryHandler that sets aside records logged inside _capture_logs for their slide"""
+    
+    def emit(self, record):
+        records = _slide_records.get()
+        if records is None:
+            super().emit(record)
+        else:
+            records.append(record)
+
+def _capture_logs(records, func, *args):
+    """Call func(*args), collecting the log records it emits in records (if not None)"""
+    token = _slide_records.set(records)
+    try:
+        return func(*args)
+    finally:
+        _slide_records.reset(token)
+
+def configure_logging(batch=False):
+    """
+    Send this module's log records to stdout as plain messages.
+    
+    Only the module logger is configured, and it does not propagate, so the
+    INFO chatter of libraries such as openai and httpx stays off stdout.
+    In batch mode records are buffered in a MemoryHandler and written out once
+    per slide (or immediately on errors) instead of one write per message.
+    Records captured by _capture_logs are held back until handed to the
+    handler, so concurrent slides do not interleave their messages.
+    
+    Returns:
+        logging.Handler: handler to flush at the end of each slide
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    handler = stream_handler
+    if batch:
+        handler = _SlideBufferHandler(capacity=1024, flushLevel=logging.ERROR, target=stream_handler)
+    log.handlers[:] = [handler]
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    return handler
 
 def main():
+    global USE_LLM_CACHE
+    
     # Parse command line arguments
     args = parse_arguments()
+    USE_LLM_CACHE = not args.no_cache
     
     # Convert 1-based slide numbers to 0-based indices
     start_slide = args.start - 1  # Convert to 0-based index
     end_slide = args.finish - 1   # Convert to 0-based index
     
-    print("🚀 Starting two-step product extraction from PowerPoint...")
-    print(f"📤 POST_TO_STRAPI: {POST_TO_STRAPI}")
-    print(f"🎯 Processing slides {args.start} to {args.finish} (indices {start_slide} to {end_slide})")
-    print()
+    batch = end_slide > start_slide
+    log_handler = configure_logging(batch=batch)
     
-    # Validate slide range
-    if start_slide < 0:
-        print(f"❌ Error: Start slide {args.start} is invalid (must be >= 1)")
-        sys.exit(1)
+    log.info("🚀 Starting two-step product extraction from PowerPoint...")
+    log.info(f"📤 POST_TO_STRAPI: {POST_TO_STRAPI}")
+    log.info(f"🎯 Processing slides {args.start} to {args.finish} (indices {start_slide} to {end_slide})")
+    log.info("")
     
-    if end_slide < start_slide:
-        print(f"❌ Error: End slide {args.finish} must be >= start slide {args.start}")
-        sys.exit(1)
+    category_map, division_map = get_maps(refresh=args.refresh_maps)
     
-    prs = Presentation(PPTX_PATH)
-    print(f"📄 Loaded presentation with {len(prs.slides)} slides")
+    # Slides extracted by earlier runs on the same file are reused; the deck is
+    # only parsed when a requested slide is missing from the cache
+    slide_cache = load_slide_cache(PPTX_PATH)
+    cached_slides = slide_cache["slides"]
+    prs = None
+    n_slides = slide_cache["n_slides"]
+    if n_slides is None or any(str(i) not in cached_slides for i in range(start_slide, min(end_slide + 1, n_slides))):
+        # Heavy dependencies are only loaded once the arguments are known to be valid
+        from pptx import Presentation
+        
+        prs = Presentation(PPTX_PATH)
+        # Count slides once; only the slides in the requested range are touched below
+        n_slides = len(prs.slides)
+        slide_cache["n_slides"] = n_slides
+        log.info(f"📄 Loaded presentation with {n_slides} slides")
+    else:
+        log.info(f"📄 Using cached content for {n_slides}-slide presentation")
     
     # Check if slide range is valid
-    if end_slide >= len(prs.slides):
-        print(f"❌ Error: End slide {args.finish} exceeds presentation length ({len(prs.slides)} slides)")
+    if end_slide >= n_slides:
+        log.error(f"❌ Error: End slide {args.finish} exceeds presentation length ({n_slides} slides)")
         sys.exit(1)
     
-    all_results = []
+    # Results are streamed into the combined file as each slide completes
+    combined_filename = os.path.join(OUTPUT_DIR, f"slides_{args.start}_to_{args.finish}_combined.json")
+    combined = JsonArrayWriter(combined_filename)
+    processed_slides = []
     
+    def read_slide(slide_index):
+        """Log the slide's header and return its (text, table_md), from the cache or the deck"""
+        log.info(f"\n{'='*60}")
+        log.info(f"📄 PROCESSING SLIDE {slide_index + 1}")
+        log.info(f"{'='*60}")
+        
+        cached = cached_slides.get(str(slide_index))
+        if cached is not None:
+            log.info("✅ Using cached slide text and table")
+            return cached
+        slide_text, table_md = extract_slide_payload(prs.slides[slide_index])
+        cached_slides[str(slide_index)] = [slide_text, table_md]
+        return slide_text, table_md
+    
+    # python-pptx is not thread-safe, so read every slide up front on this thread.
+    # In batch mode a slide's messages, from its header here to its GPT steps in
+    # a worker, are collected in one list and shown together with its result.
+    extracted = []
     for slide_index in range(start_slide, end_slide + 1):
+        records = [] if batch else None
         try:
-            print(f"\n{'='*60}")
-            print(f"📄 PROCESSING SLIDE {slide_index + 1}")
-            print(f"{'='*60}")
-            
-            result = process_slide_two_steps(prs, slide_index)
-            all_results.append(result)
-            
-            print(f"✅ Completed slide {slide_index + 1}")
-            
+            slide_text, table_md = _capture_logs(records, read_slide, slide_index)
+            extracted.append((slide_index, records, slide_text, table_md))
         except Exception as e:
-            print(f"❌ Error processing slide {slide_index + 1}: {e}")
-            continue
+            for record in records or ():
+                log_handler.handle(record)
+            log.error(f"❌ Error processing slide {slide_index + 1}: {e}")
+            log_handler.flush()
+    
+    if prs is not None:
+        save_slide_cache(slide_cache)
+    
+    # The OpenAI round-trips dominate, so run slides concurrently and collect in slide order
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(extracted)))) as executor:
+            futures = []
+            for slide_index, records, slide_text, table_md in extracted:
+                futures.append((slide_index, records, executor.submit(
+                    _capture_logs, records, process_slide_content,
+                    slide_index, slide_text, table_md, category_map, division_map)))
+            for slide_index, records, future in futures:
+                future.exception()  # wait for the slide without raising
+                for record in records or ():
+                    log_handler.handle(record)
+                try:
+                    result = future.result()
+                    combined.write(result)
+                    processed_slides.append(slide_index)
+                    
+                    log.info(f"✅ Completed slide {slide_index + 1}")
+                    
+                except Exception as e:
+                    log.error(f"❌ Error processing slide {slide_index + 1}: {e}")
+                    continue
+                finally:
+                    log_handler.flush()
+    finally:
+        combined.close()
     
-    # Save all results to a combined file
-    if all_results:
-        combined_filename = os.path.join(OUTPUT_DIR, f"slides_{args.start}_to_{args.finish}_combined.json")
-        with open(combined_filename, "w", encoding="utf-8") as f:
-            json.dump(all_results, f, indent=2, ensure_ascii=False)
-        print(f"\n📁 Saved combined results to {combined_filename}")
-        print(f"✅ Successfully processed {len(all_results)} slides")
+    if processed_slides:
+        log.info(f"\n📁 Saved combined results to {combined_filename}")
+        log.info(f"✅ Successfully processed {len(processed_slides)} slides")
         
         # Update products.json unless --no-update flag is used
         if not args.no_update:
-            update_products_json(all_results, products_json_path="../products.json")
+            update_products_json(iter_slide_payloads(processed_slides), products_json_path="../products.json")
         else:
-            print("⏭️  Skipping products.json update (--no-update flag used)")
+            log.info("⏭️  Skipping products.json update (--no-update flag used)")
     else:
-        print("\n❌ No slides were successfully processed")
+        log.error("\n❌ No slides were successfully processed")
 
 if __name__ == "__main__":
     main()
@@ -5,13 +5,17 @@ in their original format, including tables, shapes, and text boxes.
 """
 
 import argparse
-import json
 import os
 import sys
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Any, Optional
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dump_file
+
 # === CONFIGURATION ===
 PPTX_PATH = "../data/WEB MASTER Ver 9.pptx"
 OUTPUT_DIR = "slide_content"
@@ -52,45 +56,60 @@ Examples:
     
     return parser.parse_args()
 
+# getattr default that tells a missing attribute apart from one that is None
+_MISSING = object()
+
+@dataclass(slots=True)
+class ShapeContent:
+    """Extracted content of one shape; serialized as {"type", "text", "position", "size"}"""
+    type: str = "unknown"
+    text: Any = ""  # str, or the extract_table_text() dict for tables
+    position: Optional[dict] = None
+    size: Optional[dict] = None
+
 def extract_text_from_shape(shape):
     """Extract text from a shape, handling different shape types"""
-    text_content = {
-        "type": "unknown",
-        "text": "",
-        "position": None,
-        "size": None
-    }
+    text_content = ShapeContent()
+    
+    # Read each shape property once; every access re-queries the shape XML
+    shape_type = shape.shape_type
     
     # Get shape type
-    if shape.shape_type == MSO_SHAPE_TYPE.TEXT_BOX:
-        text_content["type"] = "text_box"
+    if shape_type == MSO_SHAPE_TYPE.TEXT_BOX:
+        text_content.type = "text_box"
         if shape.has_text_frame:
-            text_content["text"] = shape.text.strip()
-    elif shape.shape_type == MSO_SHAPE_TYPE.TABLE:
-        text_content["type"] = "table"
-        text_content["text"] = extract_table_text(shape.table)
-    elif shape.shape_type == MSO_SHAPE_TYPE.PICTURE:
-        text_content["type"] = "picture"
-        text_content["text"] = f"[Image: {shape.name if shape.name else 'unnamed'}]"
-    elif shape.shape_type == MSO_SHAPE_TYPE.GROUP:
-        text_content["type"] = "group"
-        text_content["text"] = "[Group of shapes]"
+            text_content.text = shape.text.strip()
+    elif shape_type == MSO_SHAPE_TYPE.TABLE:
+        text_content.type = "table"
+        text_content.text = extract_table_text(shape.table)
+    elif shape_type == MSO_SHAPE_TYPE.PICTURE:
+        text_content.type = "picture"
+        name = shape.name
+        text_content.text = f"[Image: {name if name else 'unnamed'}]"
+    elif shape_type == MSO_SHAPE_TYPE.GROUP:
+        text_content.type = "group"
+        text_content.text = "[Group of shapes]"
     else:
-        text_content["type"] = f"shape_{shape.shape_type}"
-        if hasattr(shape, 'text') and shape.text:
-            text_content["text"] = shape.text.strip()
-    
-    # Get position and size
-    if hasattr(shape, 'left') and hasattr(shape, 'top'):
-        text_content["position"] = {
-            "left": shape.left,
-            "top": shape.top
+        text_content.type = f"shape_{shape_type}"
+        text = getattr(shape, 'text', None)
+        if text:
+            text_content.text = text.strip()
+    
+    # Get position and size (a shape may have the attribute but report None)
+    left = getattr(shape, 'left', _MISSING)
+    top = getattr(shape, 'top', _MISSING)
+    if left is not _MISSING and top is not _MISSING:
+        text_content.position = {
+            "left": left,
+            "top": top
         }
     
-    if hasattr(shape, 'width') and hasattr(shape, 'height'):
-        text_content["size"] = {
-            "width": shape.width,
-            "height": shape.height
+    width = getattr(shape, 'width', _MISSING)
+    height = getattr(shape, 'height', _MISSING)
+    if width is not _MISSING and height is not _MISSING:
+        text_content.size = {
+            "width": width,
+            "height": height
         }
     
     return text_content
@@ -106,28 +125,17 @@ def extract_table_text(table):
     if not table.rows:
         return table_data
     
-    # Extract headers (first row)
-    headers = []
-    for cell in table.rows[0].cells:
-        headers.append(cell.text.strip())
+    # Read every cell once; the first row doubles as the headers
+    rows = [[cell.text.strip() for cell in row.cells] for row in table.rows]
+    headers = rows[0]
     table_data["headers"] = headers
-    
-    # Extract all rows
-    for row in table.rows:
-        row_data = []
-        for cell in row.cells:
-            row_data.append(cell.text.strip())
-        table_data["rows"].append(row_data)
+    table_data["rows"] = rows
     
     # Generate Markdown table
-    if headers and table_data["rows"]:
-        markdown_table = "| " + " | ".join(headers) + " |\n"
-        markdown_table += "| " + " | ".join(["---"] * len(headers)) + " |\n"
-        
-        for row in table_data["rows"][1:]:  # Skip header row
-            markdown_table += "| " + " | ".join(row) + " |\n"
-        
-        table_data["markdown"] = markdown_table.strip()
+    if headers:
+        lines = ["| " + " | ".join(headers) + " |", "| " + " | ".join(["---"] * len(headers)) + " |"]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])  # Skip header row
+        table_data["markdown"] = "\n".join(lines)
     
     return table_data
 
@@ -151,68 +159,101 @@ def extract_slide_content(prs, slide_index):
         slide_content["shapes"].append(shape_content)
         
         # Categorize shapes
-        if shape_content["type"] == "table":
+        if shape_content.type == "table":
             slide_content["tables"].append(shape_content)
-        elif shape_content["type"] == "text_box":
+        elif shape_content.type == "text_box":
             slide_content["text_boxes"].append(shape_content)
-        elif shape_content["type"] == "picture":
+        elif shape_content.type == "picture":
             slide_content["images"].append(shape_content)
         else:
             slide_content["other_shapes"].append(shape_content)
         
         # Collect all text
-        if shape_content["text"]:
-            if isinstance(shape_content["text"], dict):
+        text = shape_content.text
+        if text:
+            if isinstance(text, dict):
                 # Handle table content
-                if "markdown" in shape_content["text"] and shape_content["text"]["markdown"]:
-                    all_text.append(shape_content["text"]["markdown"])
-                elif "rows" in shape_content["text"]:
+                if "markdown" in text and text["markdown"]:
+                    all_text.append(text["markdown"])
+                elif "rows" in text:
                     # Convert table rows to text
                     table_text = []
-                    for row in shape_content["text"]["rows"]:
+                    for row in text["rows"]:
                         table_text.append(" | ".join(row))
                     all_text.append("\n".join(table_text))
             else:
-                all_text.append(shape_content["text"])
+                all_text.append(text)
     
     # Combine all text
     slide_content["raw_text"] = "\n\n".join(all_text)
     
     return slide_content
 
-def save_slide_content(slide_content, slide_index, output_dir):
+def _encode_default(obj):
+    """Serialize ShapeContent records as the same dicts the extractor always wrote"""
+    if isinstance(obj, ShapeContent):
+        return {field.name: getattr(obj, field.name) for field in fields(obj)}
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def save_slide_content(slide_content, slide_index, output_dir, verbose=True):
     """Save slide content to individual JSON file"""
     os.makedirs(output_dir, exist_ok=True)
     
     filename = os.path.join(output_dir, f"slide_{slide_index + 1}_content.json")
     
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(slide_content, f, indent=2, ensure_ascii=False)
+    dump_file(slide_content, filename, default=_encode_default)
     
-    print(f"📁 Saved slide {slide_index + 1} content to {filename}")
+    if verbose:
+        print(f"📁 Saved slide {slide_index + 1} content to {filename}")
     return filename
 
-def print_slide_summary(slide_content):
-    """Print a summary of what was extracted from the slide"""
-    print(f"\n📊 SLIDE {slide_content['slide_number']} SUMMARY:")
-    print(f"   📝 Text boxes: {len(slide_content['text_boxes'])}")
-    print(f"   📊 Tables: {len(slide_content['tables'])}")
-    print(f"   🖼️  Images: {len(slide_content['images'])}")
-    print(f"   🔲 Other shapes: {len(slide_content['other_shapes'])}")
+# Presentation used by worker processes; inherited from the parent when the pool forks
+_worker_prs = None
+
+def _init_worker(pptx_path):
+    """Load the presentation once per worker process (only needed when workers are spawned)"""
+    global _worker_prs
+    if _worker_prs is None:
+        _worker_prs = Presentation(pptx_path)
+
+def _extract_and_save(slide_index, output_dir):
+    """Worker: extract one slide and save its JSON; printing is left to the parent"""
+    slide_content = extract_slide_content(_worker_prs, slide_index)
+    filename = save_slide_content(slide_content, slide_index, output_dir, verbose=False)
+    return slide_content, filename
+
+def format_slide_summary(slide_content):
+    """Return the summary lines for what was extracted from the slide"""
+    lines = [
+        f"\n📊 SLIDE {slide_content['slide_number']} SUMMARY:",
+        f"   📝 Text boxes: {len(slide_content['text_boxes'])}",
+        f"   📊 Tables: {len(slide_content['tables'])}",
+        f"   🖼️  Images: {len(slide_content['images'])}",
+        f"   🔲 Other shapes: {len(slide_content['other_shapes'])}",
+    ]
     
     # Show table previews
     for i, table in enumerate(slide_content['tables']):
-        print(f"   📋 Table {i+1}: {len(table['rows'])} rows")
-        if table['markdown']:
-            print(f"      Preview: {table['markdown'][:100]}...")
+        # Table entries are shape records; the rows and Markdown live in .text
+        table_data = table.text
+        lines.append(f"   📋 Table {i+1}: {len(table_data['rows']) - 1} data rows + header")
+        if table_data['markdown']:
+            lines.append(f"      Preview: {table_data['markdown'][:100]}...")
     
     # Show text previews
     for i, text_box in enumerate(slide_content['text_boxes']):
-        preview = text_box['text'][:50] + "..." if len(text_box['text']) > 50 else text_box['text']
-        print(f"   📝 Text box {i+1}: {preview}")
+        preview = text_box.text[:50] + "..." if len(text_box.text) > 50 else text_box.text
+        lines.append(f"   📝 Text box {i+1}: {preview}")
+    
+    return lines
+
+def print_slide_summary(slide_content):
+    """Print a summary of what was extracted from the slide"""
+    sys.stdout.write("\n".join(format_slide_summary(slide_content)) + "\n")
 
 def main():
     """Main function to extract slide content"""
+    global _worker_prs
     args = parse_arguments()
     
     # Convert 1-based slide numbers to 0-based indices
@@ -246,33 +287,39 @@ def main():
         sys.exit(1)
     
     all_slide_content = []
+    slide_indices = list(range(start_slide, end_slide + 1))
     
-    for slide_index in range(start_slide, end_slide + 1):
-        try:
-            print(f"\n{'='*60}")
-            print(f"📄 EXTRACTING SLIDE {slide_index + 1}")
-            print(f"{'='*60}")
-            
-            slide_content = extract_slide_content(prs, slide_index)
-            all_slide_content.append(slide_content)
-            
-            # Save individual slide content
-            save_slide_content(slide_content, slide_index, OUTPUT_DIR)
-            
-            # Print summary
-            print_slide_summary(slide_content)
-            
-            print(f"✅ Completed slide {slide_index + 1}")
-            
-        except Exception as e:
-            print(f"❌ Error processing slide {slide_index + 1}: {e}")
-            continue
+    # Slides are independent, so parse them in worker processes and report in slide order
+    _worker_prs = prs
+    max_workers = max(1, min(os.cpu_count() or 1, len(slide_indices)))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(PPTX_PATH,)) as executor:
+        futures = [(slide_index, executor.submit(_extract_and_save, slide_index, OUTPUT_DIR)) for slide_index in slide_indices]
+        for slide_index, future in futures:
+            # Each slide's report is collected and written in one go
+            report = [
+                f"\n{'='*60}",
+                f"📄 EXTRACTING SLIDE {slide_index + 1}",
+                f"{'='*60}",
+            ]
+            try:
+                slide_content, filename = future.result()
+                all_slide_content.append(slide_content)
+                report.append(f"📁 Saved slide {slide_index + 1} content to {filename}")
+                
+                # Add summary
+                report.extend(format_slide_summary(slide_content))
+                
+                report.append(f"✅ Completed slide {slide_index + 1}")
+                
+            except Exception as e:
+                report.append(f"❌ Error processing slide {slide_index + 1}: {e}")
+            finally:
+                sys.stdout.write("\n".join(report) + "\n")
     
     # Save combined results
     if all_slide_content:
         combined_filename = os.path.join(OUTPUT_DIR, f"slides_{args.start}_to_{args.finish}_combined.json")
-        with open(combined_filename, "w", encoding="utf-8") as f:
-            json.dump(all_slide_content, f, indent=2, ensure_ascii=False)
+        dump_file(all_slide_content, combined_filename, default=_encode_default)
         print(f"\n📁 Saved combined results to {combined_filename}")
         print(f"✅ Successfully processed {len(all_slide_content)} slides")
         
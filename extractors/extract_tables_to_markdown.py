@@ -6,24 +6,34 @@ Table Extractor - Finds tables in slide content and saves them as markdown files
 import json
 import os
 import glob
-from pathlib import Path
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import load_file
 
 # === CONFIGURATION ===
 SLIDE_CONTENT_DIR = "slide_content"
 OUTPUT_DIR = "slide_content/tables"
+CACHE_FILE = os.path.join(OUTPUT_DIR, ".cache.json")  # source file -> (mtime, size) and its tables
 
 def find_slide_content_files():
     """Find all slide content JSON files"""
     pattern = os.path.join(SLIDE_CONTENT_DIR, "slide_*_content.json")
     return glob.glob(pattern)
 
+def load_slide_tables(file_path):
+    """
+    Read only the slide number and tables from a slide content JSON file.
+    
+    The rest of the document (shapes, text boxes, raw text) is dropped as soon as
+    this returns instead of staying alive while the tables are processed.
+    """
+    slide_content = load_file(file_path)
+    return slide_content.get('slide_number', 'unknown'), slide_content.get('tables', [])
+
 def extract_tables_from_slide_content(file_path):
     """Extract tables from a slide content JSON file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        slide_content = json.load(f)
-    
-    slide_number = slide_content.get('slide_number', 'unknown')
-    tables = slide_content.get('tables', [])
+    slide_number, tables = load_slide_tables(file_path)
     
     results = []
     for i, table in enumerate(tables):
@@ -40,6 +50,27 @@ def extract_tables_from_slide_content(file_path):
     
     return results
 
+def table_markdown_path(table_data, output_dir):
+    """Path of the markdown file for a table"""
+    filename = f"slide_{table_data['slide_number']}_table_{table_data['table_index']}.md"
+    return os.path.join(output_dir, filename)
+
+def load_cache():
+    """Load the manifest of already processed slide files, or an empty one"""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache):
+    """Write the manifest atomically"""
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    tmp_path = CACHE_FILE + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, CACHE_FILE)
+
 def save_table_as_markdown(table_data, output_dir):
     """Save a table as a markdown file"""
     os.makedirs(output_dir, exist_ok=True)
@@ -48,8 +79,7 @@ def save_table_as_markdown(table_data, output_dir):
     table_index = table_data['table_index']
     
     # Create filename
-    filename = f"slide_{slide_num}_table_{table_index}.md"
-    filepath = os.path.join(output_dir, filename)
+    filepath = table_markdown_path(table_data, output_dir)
     
     # Create markdown content
     markdown_content = f"""# Slide {slide_num} - Table {table_index}
@@ -81,13 +111,29 @@ def main():
         return
     
     all_tables = []
+    tables_to_save = []
+    
+    # Slide files unchanged since the last run (same mtime and size, markdown
+    # still on disk) reuse their cached tables instead of being re-processed
+    cache = load_cache()
+    new_cache = {}
     
     # Process each slide file
     for file_path in slide_files:
         print(f"\n📄 Processing {os.path.basename(file_path)}...")
         
         try:
-            tables = extract_tables_from_slide_content(file_path)
+            stat = os.stat(file_path)
+            signature = [stat.st_mtime, stat.st_size]
+            entry = cache.get(file_path)
+            if (entry and entry['signature'] == signature
+                    and all(os.path.exists(table_markdown_path(t, OUTPUT_DIR)) for t in entry['tables'])):
+                tables = entry['tables']
+                print("   ⏭️  Unchanged since last run")
+            else:
+                tables = extract_tables_from_slide_content(file_path)
+                tables_to_save.extend(tables)
+            new_cache[file_path] = {'signature': signature, 'tables': tables}
             all_tables.extend(tables)
             
             if tables:
@@ -102,9 +148,9 @@ def main():
     
     # Save tables as markdown files
     if all_tables:
-        print(f"\n💾 Saving {len(all_tables)} tables as markdown files...")
+        print(f"\n💾 Saving {len(tables_to_save)} new or changed tables as markdown files...")
         
-        for table_data in all_tables:
+        for table_data in tables_to_save:
             try:
                 filepath = save_table_as_markdown(table_data, OUTPUT_DIR)
                 print(f"   ✅ Saved: {os.path.basename(filepath)}")
@@ -125,6 +171,7 @@ def main():
                 f.write("---\n\n")
         
         print(f"   ✅ Created summary: tables_summary.md")
+        save_cache(new_cache)
         print(f"\n🎉 Successfully extracted {len(all_tables)} tables!")
         print(f"📁 Files saved in: {OUTPUT_DIR}/")
         
@@ -13,7 +13,7 @@ exit / quit        Leave the CLI
 from __future__ import annotations
 import json, os, re, sys
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 # --- config ----------------------------------------------------
 IMG_ROOT = Path(__file__).parent        # same folder; change if you like
@@ -22,27 +22,73 @@ VALID_EXT  = {".png", ".jpg", ".jpeg", ".webp", ".tif", ".tiff"}
 REF_RE     = re.compile(r"^\s*(\d+(?:\.\d+)*)")   # grabs 4.1.2 etc.
 # ---------------------------------------------------------------
 
+# per-session caches; only the 'index' command refreshes them
+_SCAN_CACHE: Optional[List[Path]] = None
+_INDEX_CACHE: Optional[Dict[str, str]] = None
+
 
 # ---------- core helpers ---------------------------------------
-def _scan() -> List[Path]:
-    return [p for p in IMG_ROOT.rglob("*") if p.suffix.lower() in VALID_EXT]
+def _scan_fast(root: str) -> List[Path]:
+    # os.scandir answers is_file/is_dir from the directory listing, so unlike
+    # rglob no Path or stat() is needed for entries that are not images
+    results: List[Path] = []
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in VALID_EXT:
+                    results.append(Path(entry.path))
+    return results
+
+def _leading_ref(name: str) -> Optional[str]:
+    # same result as REF_RE.match(name).group(1), without the regex engine
+    # and match object per file
+    s = name.lstrip()
+    n = len(s)
+    i = 0
+    while i < n and s[i].isdecimal():
+        i += 1
+    if i == 0:
+        return None
+    end = i
+    while i < n and s[i] == ".":
+        j = i + 1
+        while j < n and s[j].isdecimal():
+            j += 1
+        if j == i + 1:         # a dot not followed by digits ends the ref
+            break
+        end = i = j
+    return s[:end]
+
+def _scan(refresh: bool = False) -> List[Path]:
+    global _SCAN_CACHE
+    if _SCAN_CACHE is None or refresh:
+        _SCAN_CACHE = _scan_fast(str(IMG_ROOT))
+    return _SCAN_CACHE
 
 def build_index() -> Dict[str, str]:
+    global _INDEX_CACHE
     idx: Dict[str, str] = {}
-    for p in _scan():
-        m = REF_RE.match(p.name)
-        if not m:
+    for p in _scan(refresh=True):
+        ref = _leading_ref(p.name)
+        if ref is None:
             continue
-        ref = m.group(1)
         idx.setdefault(ref, str(p.resolve()))
     INDEX_FILE.write_text(json.dumps(idx, indent=2))
+    _INDEX_CACHE = idx
     return idx
 
 def load_index() -> Dict[str, str]:
+    global _INDEX_CACHE
+    if _INDEX_CACHE is not None:
+        return _INDEX_CACHE
     if not INDEX_FILE.exists():
         print("No index file – type 'index' first.")
         return {}
-    return json.loads(INDEX_FILE.read_text())
+    _INDEX_CACHE = json.loads(INDEX_FILE.read_text())
+    return _INDEX_CACHE
 # ---------------------------------------------------------------
 
 
@@ -75,8 +121,7 @@ def main() -> None:
         if cmd == "list":
             files = _scan()
             for p in files:
-                m = REF_RE.match(p.name)
-                ref = m.group(1) if m else "—"
+                ref = _leading_ref(p.name) or "—"
                 print(f"{ref:10}  {p.relative_to(IMG_ROOT)}")
             print(f"\n({len(files)} files)")
             continue
@@ -11,10 +11,11 @@ from extract_product_from_pptx import update_products_json
 # Load the extracted data from slides 100-112
 slide_payloads = []
 
-# Load all the slide files from 100-112
+# Load all the slide files from 100-112; list the folder once instead of checking each file
+existing_files = set(os.listdir('products')) if os.path.isdir('products') else set()
 for slide_num in range(100, 113):
     filename = f'products/slide_{slide_num}_strapi_format.json'
-    if os.path.exists(filename):
+    if f'slide_{slide_num}_strapi_format.json' in existing_files:
         with open(filename, 'r') as f:
             payload = json.load(f)
             slide_payloads.append(payload)
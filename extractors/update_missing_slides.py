@@ -6,25 +6,32 @@ import sys
 sys.path.append('.')
 
 # Import the update function
-from extract_product_from_pptx import update_products_json
+from extract_product_from_pptx import index_by_ref, load_products_once, update_products_json
 
 def check_missing_slides():
-    """Check which slides from 100-112 are missing from products.json"""
+    """
+    Check which slides from 100-112 are missing from products.json.
     
-    # Load products.json
-    with open('../products.json', 'r') as f:
-        products = json.load(f)
+    Returns:
+        tuple: (missing_slides, products, existing_refs), so update_missing_slides
+        reuses the parsed products.json and its reference index
+    """
     
-    # Get all reference strings from products.json
-    existing_refs = {p['data']['referenceString'] for p in products}
+    # Load products.json (parsed once and reused by update_missing_slides)
+    products = load_products_once('../products.json')
+    
+    # Index products.json by reference string
+    existing_refs = index_by_ref(products)
     
     # Check which slides 100-112 exist in the products folder
     missing_slides = []
     available_slides = []
     
+    # List the folder once instead of checking each file
+    existing_files = set(os.listdir('products')) if os.path.isdir('products') else set()
     for slide_num in range(100, 113):
         filename = f'products/slide_{slide_num}_strapi_format.json'
-        if os.path.exists(filename):
+        if f'slide_{slide_num}_strapi_format.json' in existing_files:
             with open(filename, 'r') as f:
                 payload = json.load(f)
                 ref = payload['data']['referenceString']
@@ -41,10 +48,10 @@ def check_missing_slides():
     for slide_num, ref, name in missing_slides:
         print(f"  Slide {slide_num}: {name} (Ref: {ref})")
     
-    return missing_slides
+    return missing_slides, products, existing_refs
 
-def update_missing_slides(missing_slides):
-    """Update products.json with missing slides"""
+def update_missing_slides(missing_slides, products, ref_to_product):
+    """Update products.json with missing slides, using the products and index from check_missing_slides"""
     if not missing_slides:
         print("No missing slides to update!")
         return
@@ -61,16 +68,16 @@ def update_missing_slides(missing_slides):
     print(f"\nUpdating {len(slide_payloads)} missing slides...")
     
     # Run the update function
-    update_products_json(slide_payloads, products_json_path="../products.json")
+    update_products_json(slide_payloads, products_json_path="../products.json", products=products, ref_to_product=ref_to_product)
     
     print("Update completed!")
 
 if __name__ == "__main__":
     print("Checking for missing slides 100-112...")
-    missing_slides = check_missing_slides()
+    missing_slides, products, existing_refs = check_missing_slides()
     
     if missing_slides:
         print(f"\nFound {len(missing_slides)} missing slides. Updating...")
-        update_missing_slides(missing_slides)
+        update_missing_slides(missing_slides, products, existing_refs)
     else:
         print("\nAll slides 100-112 are already in products.json!") 
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+HTTP session and product-create helper shared by the uploader scripts.
+
+A pooled session keeps connections to Strapi open between uploads, and 429/503
+responses are retried with backoff (honouring Retry-After) instead of the
+scripts sleeping a fixed time after every request. When Strapi's rate limiter
+reports the budget is used up (X-RateLimit-Remaining: 0) the session waits for
+X-RateLimit-Reset before returning, so the next request is not rejected.
+The session carries the STRAPI_TOKEN bearer and JSON content-type headers, so
+callers only pass the URL and the encoded body.
+
+When httpx is installed with HTTP/2 support (``pip install httpx[http2]``) the
+session multiplexes all concurrent uploads over a single connection; otherwise
+it is a requests.Session with one HTTP/1.1 connection per worker.
+"""
+import os
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except ImportError:  # httpx/h2 are optional; fall back to requests over HTTP/1.1
+    httpx = None
+
+# Only statuses where Strapi did not create the product are retried; read errors
+# are not retried at all, since the request may already have been processed
+RETRY_STATUSES = (429, 503)
+MAX_WORKERS = 5  # Concurrent uploads, and the default pool size
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RATE_LIMIT_MAX_WAIT = 60  # seconds; cap on waiting for a rate-limit window or Retry-After
+REQUEST_TIMEOUT = 30  # seconds; a stalled HTTP/2 request fails instead of hanging
+
+
+def _pace(response, *args, **kwargs):
+    """Sleep until the rate-limit window resets if response used up the budget"""
+    if response.headers.get("X-RateLimit-Remaining") != "0":
+        return
+    try:
+        reset = float(response.headers.get("X-RateLimit-Reset", ""))
+    except ValueError:
+        return
+    # Depending on the limiter, Reset is an epoch timestamp or a delay in seconds
+    wait = reset - time.time() if reset > 1e9 else reset
+    if wait > 0:
+        time.sleep(min(wait, RATE_LIMIT_MAX_WAIT))
+
+
+class _Http2Session:
+    """requests-style post() on top of an HTTP/2 httpx.Client"""
+
+    def __init__(self, pool_size, headers):
+        self.client = httpx.Client(
+            http2=True,
+            headers=headers,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def post(self, url, data=None):
+        for attempt in range(RETRY_TOTAL + 1):
+            response = self.client.post(url, content=data)
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                _pace(response)
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else RETRY_BACKOFF * 2 ** attempt
+            time.sleep(min(delay, RATE_LIMIT_MAX_WAIT))
+        return response
+
+
+def create_product(session, url, body, name):
+    """
+    POST one encoded product to Strapi and report the outcome.
+    
+    name identifies the product (or its file) in error messages, since a
+    failed response does not carry it.
+    
+    Returns:
+        bool: True if Strapi created the product
+    """
+    try:
+        response = session.post(url, data=body)
+        if response.status_code in (200, 201):
+            data = response.json()["data"]
+            print(f"✅ Successfully created product: {data['attributes']['name']} (ID: {data['id']})")
+            return True
+        print(f"❌ Error {response.status_code} for {name}: {response.text}")
+        return False
+    except Exception as e:
+        print(f"❌ Network error for {name}: {e}")
+        return False
+
+
+def _auth_headers():
+    """Headers for Strapi write requests; STRAPI_TOKEN is read when the session is made, after load_dotenv()"""
+    return {
+        "Authorization": f"Bearer {os.getenv('STRAPI_TOKEN')}",
+        "Content-Type": "application/json"
+    }
+
+
+def make_session(pool_size=MAX_WORKERS):
+    """Create an authenticated pooled session sized for pool_size concurrent uploads"""
+    if httpx is not None:
+        return _Http2Session(pool_size, _auth_headers())
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        read=False,
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(_auth_headers())
+    session.hooks["response"].append(_pace)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
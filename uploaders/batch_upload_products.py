@@ -2,48 +2,111 @@
 """
 Batch upload products to production Strapi with error tracking and progress monitoring
 """
-import json
 import os
-import requests
-import time
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from _http import make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dump_lines, dumps, load_file
 
 load_dotenv()
 
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 PRODUCTION_URL = "https://adminpanel.lets-med.com/api/medical-products"
 
+# Fields Strapi needs on every product, with the JSON type it expects
+REQUIRED_DATA_FIELDS = {
+    'name': str,
+    'slug': str,
+    'referenceString': str,
+    'category': int,
+    'divisions': list,
+}
+
+def schema_errors(product):
+    """Return the problems that would make Strapi reject product, if any"""
+    data = product.get('data') if isinstance(product, dict) else None
+    if not isinstance(data, dict):
+        return ["missing 'data' object"]
+    errors = []
+    for field, expected in REQUIRED_DATA_FIELDS.items():
+        value = data.get(field)
+        if value is None:
+            errors.append(f"missing '{field}'")
+        elif not isinstance(value, expected) or isinstance(value, bool):
+            errors.append(f"'{field}' should be {expected.__name__}, got {type(value).__name__}")
+    return errors
+
 class BatchUploader:
     def __init__(self, batch_size=5):
         self.batch_size = batch_size
         self.uploaded_products = []
         self.failed_products = []
+        # Rejected by schema_errors and never sent; logged apart from failed_products
+        # so upload_failed_products.py does not retry them
+        self.invalid_products = []
         self.session_start = datetime.now()
+        # Append-only JSON Lines logs, opened on first use and written after
+        # every batch, so an interrupted run still leaves its progress on disk
+        self.progress_stamp = self.session_start.strftime("%Y%m%d_%H%M%S")
+        self.progress_files = {}
+        # One pooled connection per concurrent upload
+        self.session = make_session(pool_size=batch_size)
         
     def load_products(self):
         """Load all products from products.json"""
         try:
-            with open('products.json', 'r', encoding='utf-8') as f:
-                products = json.load(f)
+            products = load_file('products.json')
             print(f"✅ Loaded {len(products)} products from products.json")
-            return products
         except Exception as e:
             print(f"❌ Error reading products.json: {e}")
             return []
+        
+        # Check the schema up front so malformed products are reported before
+        # any upload starts instead of coming back as HTTP 400s mid-run
+        valid = []
+        for product in products:
+            errors = schema_errors(product)
+            if not errors:
+                valid.append(product)
+                continue
+            data = product.get('data') if isinstance(product, dict) else None
+            data = data if isinstance(data, dict) else {}
+            self.invalid_products.append({
+                'product_name': data.get('name', 'Unknown'),
+                'reference': data.get('referenceString', 'No Reference'),
+                'error': f"Invalid product data: {', '.join(errors)}",
+                'product_data': product,
+                'upload_time': datetime.now().isoformat()
+            })
+        if self.invalid_products:
+            print(f"⚠️  Skipping {len(self.invalid_products)} products with invalid data (see invalid products)")
+            self.append_progress('invalid', self.invalid_products)
+        return valid
+    
+    def append_progress(self, kind, records):
+        """Append records to this session's uploaded/failed JSON Lines log"""
+        if not records:
+            return
+        f = self.progress_files.get(kind)
+        if f is None:
+            f = self.progress_files[kind] = open(f"{kind}_products_{self.progress_stamp}.jsonl", 'ab')
+        f.write(dump_lines(records))
+        f.flush()
     
     def upload_single_product(self, product, index):
         """Upload a single product and return result"""
-        product_name = product.get('data', {}).get('name', 'Unknown')
-        reference = product.get('data', {}).get('referenceString', 'No Reference')
-        
-        headers = {
-            "Authorization": f"Bearer {STRAPI_TOKEN}",
-            "Content-Type": "application/json"
-        }
+        data = product.get('data') or {}
+        product_name = data.get('name', 'Unknown')
+        reference = data.get('referenceString', 'No Reference')
         
         try:
-            response = requests.post(PRODUCTION_URL, json=product, headers=headers)
+            # Encode the body ourselves (orjson when available) instead of requests' json=;
+            # a retried request re-sends these same bytes
+            body = dumps(product)
+            response = self.session.post(PRODUCTION_URL, data=body)
             
             if response.status_code in (200, 201):
                 result = response.json()
@@ -82,74 +145,65 @@ class BatchUploader:
         print(f"📦 Products {start_index + 1} to {end_index} of {len(products)}")
         print("=" * 60)
         
-        batch_results = []
+        # Upload the whole batch concurrently; results are reported in product order
+        with ThreadPoolExecutor(max_workers=self.batch_size) as executor:
+            batch_results = list(executor.map(
+                self.upload_single_product,
+                batch_products,
+                range(start_index, end_index)
+            ))
         
-        for i, product in enumerate(batch_products):
-            global_index = start_index + i
-            print(f"\n📤 Uploading product {global_index + 1}/{len(products)}: {product.get('data', {}).get('name', 'Unknown')}")
-            
-            result = self.upload_single_product(product, global_index)
+        # The whole batch has finished by now, so it shares one timestamp, and
+        # its report is written to stdout in one go rather than line by line
+        upload_time = datetime.now().isoformat()
+        report = []
+        uploaded = []
+        failed = []
+        for i, (product, result) in enumerate(zip(batch_products, batch_results)):
+            position = f"{start_index + i + 1}/{len(products)}"
             
             if result['success']:
-                print(f"✅ Success! ID: {result['product_id']}")
-                self.uploaded_products.append({
+                report.append(f"\n✅ Uploaded product {position}: {result['product_name']} (ID: {result['product_id']})")
+                uploaded.append({
                     'product_id': result['product_id'],
                     'product_name': result['product_name'],
                     'reference': result['reference'],
-                    'upload_time': datetime.now().isoformat()
+                    'upload_time': upload_time
                 })
             else:
-                print(f"❌ Failed: {result['error']}")
-                self.failed_products.append({
+                report.append(f"\n❌ Failed to upload product {position}: {result['product_name']}")
+                report.append(f"   {result['error']}")
+                failed.append({
                     'product_name': result['product_name'],
                     'reference': result['reference'],
                     'error': result['error'],
                     'product_data': product,
-                    'upload_time': datetime.now().isoformat()
+                    'upload_time': upload_time
                 })
-            
-            batch_results.append(result)
-            
-            # Small delay to avoid overwhelming the server
-            time.sleep(0.5)
+        print("\n".join(report))
+        
+        self.uploaded_products.extend(uploaded)
+        self.failed_products.extend(failed)
+        self.append_progress('uploaded', uploaded)
+        self.append_progress('failed', failed)
         
         return batch_results
     
     def save_progress(self):
-        """Save upload progress and failed products"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Save uploaded products
-        if self.uploaded_products:
-            uploaded_file = f"uploaded_products_{timestamp}.json"
-            with open(uploaded_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'uploaded_count': len(self.uploaded_products),
-                    'uploaded_products': self.uploaded_products,
-                    'session_start': self.session_start.isoformat(),
-                    'session_end': datetime.now().isoformat()
-                }, f, indent=2, ensure_ascii=False)
-            print(f"💾 Saved uploaded products to: {uploaded_file}")
-        
-        # Save failed products
-        if self.failed_products:
-            failed_file = f"failed_products_{timestamp}.json"
-            with open(failed_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'failed_count': len(self.failed_products),
-                    'failed_products': self.failed_products,
-                    'session_start': self.session_start.isoformat(),
-                    'session_end': datetime.now().isoformat()
-                }, f, indent=2, ensure_ascii=False)
-            print(f"💾 Saved failed products to: {failed_file}")
+        """Close the progress logs; every batch has already been appended to them"""
+        for kind, f in self.progress_files.items():
+            f.close()
+            print(f"💾 Saved {kind} products to: {f.name}")
+        self.progress_files.clear()
     
     def print_summary(self, total_products):
-        """Print upload summary"""
+        """Print upload summary; total_products includes the products skipped as invalid"""
         print("\n" + "=" * 60)
         print("📊 UPLOAD SUMMARY")
         print("=" * 60)
         print(f"📦 Total products: {total_products}")
         print(f"✅ Successfully uploaded: {len(self.uploaded_products)}")
+        print(f"⚠️  Skipped (invalid data): {len(self.invalid_products)}")
         print(f"❌ Failed uploads: {len(self.failed_products)}")
         print(f"📈 Success rate: {(len(self.uploaded_products)/total_products)*100:.1f}%")
         
@@ -162,9 +216,22 @@ class BatchUploader:
             print(f"\n❌ Failed products:")
             for product in self.failed_products:
                 print(f"   - {product['product_name']} ({product['reference']}): {product['error']}")
+        
+        if self.invalid_products:
+            print(f"\n⚠️  Invalid products (not uploaded):")
+            for product in self.invalid_products:
+                print(f"   - {product['product_name']} ({product['reference']}): {product['error']}")
     
     def run_upload(self):
         """Main upload process"""
+        try:
+            return self._run_upload()
+        finally:
+            # Early returns (nothing to upload, cancelled) leave the invalid
+            # log opened by load_products; this is a no-op after a full run
+            self.save_progress()
+    
+    def _run_upload(self):
         print("🚀 Batch Product Upload to Production")
         print("=" * 60)
         
@@ -203,7 +270,7 @@ class BatchUploader:
         
         # Save progress and print summary
         self.save_progress()
-        self.print_summary(total_products)
+        self.print_summary(total_products + len(self.invalid_products))
         
         return True
 
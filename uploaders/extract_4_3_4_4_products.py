@@ -1,5 +1,7 @@
-import json
 import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dump_files, filename_safe, load_file
 
 # Paths
 PRODUCTS_JSON = '../products.json'
@@ -9,20 +11,21 @@ OUTPUT_DIR = 'products'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Load products.json
-with open(PRODUCTS_JSON, 'r', encoding='utf-8') as f:
-    products = json.load(f)
+products = load_file(PRODUCTS_JSON)
 
 # Filter products with referenceString starting with 4.3 or 4.4
-selected = [p for p in products if p['data']['referenceString'].startswith('4.3') or p['data']['referenceString'].startswith('4.4')]
+selected = [p for p in products if p['data']['referenceString'].startswith(('4.3', '4.4'))]
 
 print(f"Found {len(selected)} products with referenceString 4.3* or 4.4*")
 
 # Save each as a separate JSON file
+prefix = OUTPUT_DIR + os.sep
+outputs = []
 for p in selected:
-    ref = p['data']['referenceString'].replace('.', '_')
-    name = p['data']['name'].replace(' ', '_').replace('/', '_')
-    filename = f'strapi_{ref}_{name}.json'
-    out_path = os.path.join(OUTPUT_DIR, filename)
-    with open(out_path, 'w', encoding='utf-8') as out:
-        json.dump(p['data'], out, ensure_ascii=False, indent=2)
+    data = p['data']
+    ref = data['referenceString'].replace('.', '_')
+    name = filename_safe(data['name'])
+    outputs.append((data, f'{prefix}strapi_{ref}_{name}.json'))
+
+for out_path in dump_files(outputs):
     print(f"Saved {out_path}") 
\ No newline at end of file
@@ -1,5 +1,7 @@
-import json
 import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dump_files, filename_safe, iter_items
 
 # Paths
 PRODUCTS_JSON = '../products.json'
@@ -8,28 +10,34 @@ OUTPUT_DIR = 'products'
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-# Load products.json
-with open(PRODUCTS_JSON, 'r', encoding='utf-8') as f:
-    products = json.load(f)
-
 # Specific reference strings to extract
-target_refs = ['4.3.2', '4.5.1', '4.8.2']
+target_refs = frozenset({'4.3.2', '4.5.1', '4.8.2'})
 
-# Filter products with specific reference strings
-selected = [p for p in products if p['data']['referenceString'] in target_refs]
+# Stream products.json and stop as soon as every reference has been found
+selected = []
+found_refs = set()
+for p in iter_items(PRODUCTS_JSON):
+    ref = p['data']['referenceString']
+    if ref in target_refs:
+        selected.append(p)
+        found_refs.add(ref)
+        if len(found_refs) == len(target_refs):
+            break
 
 print(f"Found {len(selected)} products with specified reference strings")
 
 # Save each as a separate JSON file in the correct format for upload
+prefix = OUTPUT_DIR + os.sep
+outputs = []
 for p in selected:
-    ref = p['data']['referenceString']
-    name = p['data']['name'].replace(' ', '_').replace('/', '_')
-    filename = f'product_{ref}_{name}.json'
-    out_path = os.path.join(OUTPUT_DIR, filename)
+    data = p['data']
+    ref = data['referenceString']
+    name = filename_safe(data['name'])
     
     # Save in the format expected by upload_product.py: { "data": {...} }
-    with open(out_path, 'w', encoding='utf-8') as out:
-        json.dump({"data": p['data']}, out, ensure_ascii=False, indent=2)
+    outputs.append(({"data": data}, f'{prefix}product_{ref}_{name}.json'))
+
+for out_path in dump_files(outputs):
     print(f"Saved {out_path}")
 
 print("\nProducts ready for upload:")
@@ -2,10 +2,12 @@
 """
 Test uploading one product to production Strapi
 """
-import json
 import os
-import requests
+import sys
 from dotenv import load_dotenv
+from _http import make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dumps, iter_items
 
 # Load environment variables
 load_dotenv()
@@ -19,15 +21,9 @@ def upload_product_to_production(product_data):
     product_name = product_data['data']['name']
     print(f"📤 Uploading {product_name} to production...")
     
-    # Prepare headers
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     # Make the POST request
     try:
-        response = requests.post(PRODUCTION_URL, json=product_data, headers=headers)
+        response = make_session(pool_size=1).post(PRODUCTION_URL, data=dumps(product_data))
         
         if response.status_code in (200, 201):
             result = response.json()
@@ -53,37 +49,34 @@ def main():
         print("❌ STRAPI_TOKEN not found in .env file")
         return
     
-    # Load products.json
+    # Stream products.json and stop at the first product with a valid category mapping
+    test_product = None
     try:
-        with open('products.json', 'r', encoding='utf-8') as f:
-            all_products = json.load(f)
+        for product in iter_items('products.json'):
+            product_data = product.get('data', {})
+            category_name = product_data.get('categoryName', '')
+            
+            # Skip products with missing or problematic category names
+            if category_name and category_name.strip() and not category_name.startswith('SCALP VEIN SETS'):
+                test_product = product
+                break
     except Exception as e:
         print(f"❌ Error reading products.json: {e}")
         return
     
-    # Find a product with valid category mapping
-    test_product = None
-    for product in all_products:
-        product_data = product.get('data', {})
-        category_name = product_data.get('categoryName', '')
-        
-        # Skip products with missing or problematic category names
-        if category_name and category_name.strip() and not category_name.startswith('SCALP VEIN SETS'):
-            test_product = product
-            break
-    
     if not test_product:
         print("❌ No suitable test product found")
         return
     
-    product_name = test_product['data']['name']
-    category_name = test_product['data']['categoryName']
-    divisions = test_product['data'].get('divisions', [])
+    data = test_product['data']
+    product_name = data['name']
+    category_name = data['categoryName']
+    divisions = data.get('divisions', [])
     
     print(f"🎯 Selected test product: {product_name}")
     print(f"   Category: {category_name}")
     print(f"   Divisions: {divisions}")
-    print(f"   Slug: {test_product['data'].get('slug', 'N/A')}")
+    print(f"   Slug: {data.get('slug', 'N/A')}")
     
     # Upload the product
     success = upload_product_to_production(test_product)
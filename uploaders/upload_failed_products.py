@@ -2,63 +2,98 @@
 """
 Re-upload failed products with fixes
 """
-import json
+import itertools
 import os
-import requests
-import time
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from _http import MAX_WORKERS, make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dumps, load_file, load_lines
 
 load_dotenv()
 
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 PRODUCTION_URL = "https://adminpanel.lets-med.com/api/medical-products"
 
+# Products whose slugs already exist in production and need a unique suffix
+DUP_SLUG_NAMES = frozenset({
+    "INSULINE SYRINGES",
+    "HYPODERMIC 2-PARTS SYRINGES",
+    "LIGHT PROOF HYPODERMIC SYRINGES",
+    "ORAL/FEEDING SYRINGES",
+})
+
+# One timestamp per run plus a counter, so every fixed slug is unique even if
+# two products start from the same slug
+SLUG_TIMESTAMP = datetime.now().strftime("%Y%m%d_%H%M%S")
+_slug_counter = itertools.count(1)
+
+SESSION = make_session(pool_size=MAX_WORKERS)
+
 def load_failed_products():
-    """Load failed products from the latest failed_products file"""
-    import glob
-    failed_files = glob.glob("failed_products_*.json")
-    if not failed_files:
+    """
+    Load failed products from the latest failed_products file.
+    
+    Only upload failures are read: batch_upload_products.py logs products
+    rejected by its schema check to invalid_products_*.jsonl instead.
+    """
+    # The names end in a %Y%m%d_%H%M%S timestamp, so the largest name is the
+    # latest file; no stat() per entry is needed
+    with os.scandir('.') as it:
+        latest_file = max(
+            (entry.name for entry in it
+             if entry.name.startswith("failed_products_") and entry.name.endswith((".json", ".jsonl"))),
+            default=None,
+        )
+    if latest_file is None:
         print("❌ No failed products file found")
         return []
     
-    # Get the latest file
-    latest_file = max(failed_files)
     print(f"📁 Loading failed products from: {latest_file}")
     
     try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data['failed_products']
+        # batch_upload_products.py appends one JSON record per line; older
+        # runs wrote a single JSON document
+        if latest_file.endswith(".jsonl"):
+            records = load_lines(latest_file)
+        else:
+            records = load_file(latest_file)['failed_products']
     except Exception as e:
         print(f"❌ Error reading failed products: {e}")
         return []
+    
+    # Products rejected by the schema check (logged here by older batch runs)
+    # would only fail again, and may lack the fields read below
+    retryable = [
+        record for record in records
+        if isinstance(record.get('product_data'), dict)
+        and isinstance(record['product_data'].get('data'), dict)
+        and not (record.get('error') or '').startswith("Invalid product data")
+    ]
+    if len(retryable) < len(records):
+        print(f"⚠️  Skipping {len(records) - len(retryable)} products with invalid data")
+    return retryable
 
 def fix_product_slugs(product_data):
-    """Fix duplicate slugs by adding timestamp"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    old_slug = product_data['data']['slug']
-    new_slug = f"{old_slug}-{timestamp}"
-    product_data['data']['slug'] = new_slug
+    """Fix duplicate slugs by adding the run timestamp and a counter"""
+    data = product_data['data']
+    data['slug'] = f"{data.get('slug', '')}-{SLUG_TIMESTAMP}-{next(_slug_counter)}"
     return product_data
 
 def upload_single_product(product_data, index):
     """Upload a single product and return result"""
-    product_name = product_data['data']['name']
-    reference = product_data['data']['referenceString']
+    data = product_data['data']
+    product_name = data.get('name', 'Unknown')
+    reference = data.get('referenceString', 'No Reference')
     
     # Fix slug if it's a duplicate
-    if product_name in ["INSULINE SYRINGES", "HYPODERMIC 2-PARTS SYRINGES", 
-                       "LIGHT PROOF HYPODERMIC SYRINGES", "ORAL/FEEDING SYRINGES"]:
+    if product_name in DUP_SLUG_NAMES:
         product_data = fix_product_slugs(product_data)
     
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     try:
-        response = requests.post(PRODUCTION_URL, json=product_data, headers=headers)
+        response = SESSION.post(PRODUCTION_URL, data=dumps(product_data))
         
         if response.status_code in (200, 201):
             result = response.json()
@@ -68,7 +103,7 @@ def upload_single_product(product_data, index):
                 'product_id': product_id,
                 'product_name': product_name,
                 'reference': reference,
-                'new_slug': product_data['data']['slug'],
+                'new_slug': data.get('slug'),
                 'response': result
             }
         else:
@@ -116,26 +151,31 @@ def main():
     successful_uploads = []
     failed_uploads = []
     
-    for i, failed_product in enumerate(failed_products, 1):
-        product_data = failed_product['product_data']
-        print(f"\n📤 Re-uploading product {i}/{len(failed_products)}: {product_data['data']['name']}")
-        print(f"   Reference: {product_data['data']['referenceString']}")
-        print(f"   Category: {product_data['data']['categoryName']} (ID: {product_data['data']['category']})")
-        print(f"   Divisions: {product_data['data'].get('divisionNames', [])} (IDs: {product_data['data']['divisions']})")
-        
-        result = upload_single_product(product_data, i)
+    # Upload concurrently and report in the original order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [
+            executor.submit(upload_single_product, failed_product['product_data'], i)
+            for i, failed_product in enumerate(failed_products, 1)
+        ]
+        results = [future.result() for future in futures]
+    
+    for i, (failed_product, result) in enumerate(zip(failed_products, results), 1):
+        data = failed_product['product_data']['data']
+        if result['success']:
+            print(f"\n✅ Re-uploaded product {i}/{len(failed_products)}: {result['product_name']} (ID: {result['product_id']})")
+        else:
+            print(f"\n❌ Failed to re-upload product {i}/{len(failed_products)}: {result['product_name']}")
+        print(f"   Reference: {result['reference']}")
+        print(f"   Category: {data.get('categoryName')} (ID: {data.get('category')})")
+        print(f"   Divisions: {data.get('divisionNames', [])} (IDs: {data.get('divisions')})")
         
         if result['success']:
-            print(f"✅ Success! ID: {result['product_id']}")
             if 'new_slug' in result:
                 print(f"   New slug: {result['new_slug']}")
             successful_uploads.append(result)
         else:
-            print(f"❌ Failed: {result['error']}")
+            print(f"   Error: {result['error']}")
             failed_uploads.append(result)
-        
-        # Small delay
-        time.sleep(0.5)
     
     # Print summary
     print("\n" + "=" * 60)
@@ -2,10 +2,13 @@
 """
 Upload the first 3 products with a slug from products.json to Strapi API
 """
-import json
 import os
-import requests
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from _http import create_product, make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dumps, iter_items
 
 # Load environment variables
 load_dotenv()
@@ -13,42 +16,29 @@ load_dotenv()
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 STRAPI_URL = "http://localhost:1337/api/medical-products"
 
+SESSION = make_session(pool_size=3)
+
 
 def upload_product_directly(product_data):
     """Upload a product data directly to Strapi"""
     product_name = product_data['data']['name']
     print(f"\U0001F4E4 Uploading {product_name}...")
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    try:
-        response = requests.post(STRAPI_URL, json=product_data, headers=headers)
-        if response.status_code in (200, 201):
-            result = response.json()
-            product_id = result["data"]["id"]
-            product_name = result["data"]["attributes"]["name"]
-            print(f"✅ Successfully created product: {product_name} (ID: {product_id})")
-            return True
-        else:
-            print(f"❌ Error {response.status_code}: {response.text}")
-            return False
-    except Exception as e:
-        print(f"❌ Network error: {e}")
-        return False
+    # Encoded once; a retried request re-sends these same bytes
+    body = dumps(product_data)
+    return create_product(SESSION, STRAPI_URL, body, product_name)
 
 def main():
-    # Load products.json (adjust path if needed)
-    with open('../products.json', 'r', encoding='utf-8') as f:
-        all_products = json.load(f)
-    # Filter for products with a slug
-    products_with_slug = [p for p in all_products if p.get('data', {}).get('slug')]
-    # Take the first 3
-    selected_products = products_with_slug[:3]
+    # Stream products.json (adjust path if needed) and stop at the first 3 products with a slug
+    selected_products = []
+    for p in iter_items('../products.json'):
+        if p.get('data', {}).get('slug'):
+            selected_products.append(p)
+            if len(selected_products) == 3:
+                break
     print(f"Found {len(selected_products)} products with a slug. Uploading...")
-    for i, product in enumerate(selected_products, 1):
-        print(f"\nUploading product {i}/{len(selected_products)}:")
-        upload_product_directly(product)
+    # The three uploads are independent, so send them together
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(upload_product_directly, selected_products))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -2,74 +2,128 @@
 """
 Upload JSON products to Strapi API
 """
-import json
+import argparse
+import fnmatch
 import os
-import requests
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from _http import MAX_WORKERS, create_product, make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import loads
 
 # Load environment variables
 load_dotenv()
 
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 STRAPI_URL = "http://localhost:1337/api/medical-products"
+PRODUCTS_DIR = "products"
 
-def upload_product(json_file_path):
-    """Upload a single product JSON file to Strapi"""
+
+def upload_product(json_file_path, session, dry_run=False):
+    """Upload a single product JSON file to Strapi over session; with dry_run only validate it"""
     
-    print(f"📤 Uploading {json_file_path}...")
+    print(f"📤 {'Checking' if dry_run else 'Uploading'} {json_file_path}...")
     
-    # Read the JSON file
+    # Read the JSON file; it is parsed only to check it is valid, and the
+    # original bytes are sent as the request body without re-encoding
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            payload = json.load(f)
+        with open(json_file_path, 'rb') as f:
+            body = f.read()
+        loads(body)
     except Exception as e:
         print(f"❌ Error reading {json_file_path}: {e}")
         return False
     
-    # Prepare headers
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
+    if dry_run:
+        print(f"✅ {json_file_path} is valid JSON (dry run, not uploaded)")
+        return True
     
-    # Make the POST request
-    try:
-        response = requests.post(STRAPI_URL, json=payload, headers=headers)
-        
-        if response.status_code in (200, 201):
-            result = response.json()
-            product_id = result["data"]["id"]
-            product_name = result["data"]["attributes"]["name"]
-            print(f"✅ Successfully created product: {product_name} (ID: {product_id})")
-            return True
-        else:
-            print(f"❌ Error {response.status_code}: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Network error: {e}")
-        return False
+    return create_product(session, STRAPI_URL, body, json_file_path)
 
 def list_available_files():
     """List all available JSON files"""
-    products_dir = "products"
-    if not os.path.exists(products_dir):
+    try:
+        # scandir reports file types from the directory listing, so regular
+        # files are picked out without a stat() per entry; dotfiles are caches
+        # left by older extractor runs, not products
+        with os.scandir(PRODUCTS_DIR) as it:
+            return [entry.name for entry in it
+                    if entry.name.endswith('.json') and not entry.name.startswith('.') and entry.is_file()]
+    except FileNotFoundError:
         print("❌ Products directory not found")
         return []
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {number}")
+    return number
+
+def upload_files(file_paths, session, concurrency=MAX_WORKERS, dry_run=False):
+    """
+    Upload many product JSON files concurrently over session without prompting.
     
-    json_files = [f for f in os.listdir(products_dir) if f.endswith('.json')]
-    return json_files
+    Returns:
+        list: paths of the files that failed to upload (or validate, with dry_run)
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda path: upload_product(path, session, dry_run), file_paths))
+    return [path for path, ok in zip(file_paths, results) if not ok]
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Upload product JSON files to Strapi. Without --all, --files or --pattern "
+                    "the files in products/ are offered one at a time."
+    )
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--all", action="store_true", help="Upload every JSON file in products/")
+    selection.add_argument("--files", nargs="+", metavar="PATH", help="Upload these JSON files")
+    selection.add_argument("--pattern", help="Upload the files in products/ matching this glob, e.g. 'product_4.3*.json'")
+    parser.add_argument("--concurrency", type=positive_int, default=MAX_WORKERS, help=f"Number of uploads in flight at once (default {MAX_WORKERS})")
+    parser.add_argument("--dry-run", action="store_true", help="Only check the selected files are valid JSON")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    
     print("🚀 Strapi Product Uploader")
     print("=" * 40)
     
     # Check if token is available
-    if not STRAPI_TOKEN:
+    if not STRAPI_TOKEN and not args.dry_run:
         print("❌ STRAPI_TOKEN not found in .env file")
         print("Please make sure you have a valid API token with write permissions")
         return
     
+    # Batch mode: upload the selected files without prompting
+    if args.all or args.files or args.pattern:
+        if args.files:
+            file_paths = args.files
+        else:
+            pattern = args.pattern or "*.json"
+            file_paths = [os.path.join(PRODUCTS_DIR, name)
+                          for name in sorted(fnmatch.filter(list_available_files(), pattern))]
+        if not file_paths:
+            print("❌ No matching JSON files found")
+            return
+        
+        print(f"📁 {'Checking' if args.dry_run else 'Uploading'} {len(file_paths)} files with concurrency {args.concurrency}")
+        # Size the connection pool to the number of concurrent uploads
+        session = make_session(pool_size=args.concurrency)
+        failed = upload_files(file_paths, session, args.concurrency, args.dry_run)
+        success_count = len(file_paths) - len(failed)
+        print(f"\n🎉 Done! {success_count}/{len(file_paths)} files {'valid' if args.dry_run else 'uploaded successfully'}.")
+        if failed:
+            print(f"❌ Failed files ({len(failed)}):")
+            for path in failed:
+                print(f"  - {path}")
+        return
+    
     # List available files
     json_files = list_available_files()
     if not json_files:
@@ -80,6 +134,9 @@ def main():
     for i, filename in enumerate(json_files, 1):
         print(f"  {i}. {filename}")
     
+    # Files are uploaded one at a time, so one connection is enough
+    session = make_session(pool_size=1)
+    
     # Ask user which file to upload
     while True:
         try:
@@ -92,10 +149,10 @@ def main():
             file_index = int(choice) - 1
             if 0 <= file_index < len(json_files):
                 selected_file = json_files[file_index]
-                file_path = os.path.join("products", selected_file)
+                file_path = os.path.join(PRODUCTS_DIR, selected_file)
                 
                 # Upload the product
-                success = upload_product(file_path)
+                success = upload_product(file_path, session)
                 
                 if success:
                     # Ask if user wants to upload another
@@ -2,11 +2,14 @@
 """
 Upload 5 random products to Strapi API
 """
-import json
 import os
-import requests
+import sys
 import random
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from _http import MAX_WORKERS, create_product, make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dumps, load_file
 
 # Load environment variables
 load_dotenv()
@@ -14,35 +17,15 @@ load_dotenv()
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 STRAPI_URL = "http://localhost:1337/api/medical-products"
 
+SESSION = make_session()
+
 def upload_product_directly(product_data):
     """Upload a product data directly to Strapi"""
     
     product_name = product_data['data']['name']
     print(f"📤 Uploading {product_name}...")
     
-    # Prepare headers
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    # Make the POST request
-    try:
-        response = requests.post(STRAPI_URL, json=product_data, headers=headers)
-        
-        if response.status_code in (200, 201):
-            result = response.json()
-            product_id = result["data"]["id"]
-            product_name = result["data"]["attributes"]["name"]
-            print(f"✅ Successfully created product: {product_name} (ID: {product_id})")
-            return True
-        else:
-            print(f"❌ Error {response.status_code}: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Network error: {e}")
-        return False
+    return create_product(SESSION, STRAPI_URL, dumps(product_data), product_name)
 
 def main():
     print("🎲 Random Product Uploader (5 Products)")
@@ -56,8 +39,7 @@ def main():
     
     # Load products.json
     try:
-        with open('../products.json', 'r', encoding='utf-8') as f:
-            all_products = json.load(f)
+        all_products = load_file('../products.json')
     except Exception as e:
         print(f"❌ Error reading products.json: {e}")
         return
@@ -73,15 +55,15 @@ def main():
     
     print("\n" + "=" * 50)
     
-    # Upload each product
-    success_count = 0
-    for i, product in enumerate(selected_products, 1):
-        print(f"\n📦 Uploading product {i}/5...")
-        success = upload_product_directly(product)
-        if success:
-            success_count += 1
-        else:
-            print(f"⚠️  Skipping due to upload error (likely missing category/division)")
+    # Upload all products concurrently; results come back in selection order
+    print(f"\n📦 Uploading {len(selected_products)} products...")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = list(executor.map(upload_product_directly, selected_products))
+    
+    success_count = sum(results)
+    for product, success in zip(selected_products, results):
+        if not success:
+            print(f"⚠️  Skipped {product['data']['name']} due to upload error (likely missing category/division)")
     
     print(f"\n🎉 Upload complete! {success_count}/{len(selected_products)} products uploaded successfully.")
     
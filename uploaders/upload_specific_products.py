@@ -2,10 +2,13 @@
 """
 Upload specific products directly to Strapi API
 """
-import json
 import os
-import requests
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from _http import MAX_WORKERS, create_product, make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import loads
 
 # Load environment variables
 load_dotenv()
@@ -13,42 +16,24 @@ load_dotenv()
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 STRAPI_URL = "http://localhost:1337/api/medical-products"
 
+SESSION = make_session()
+
 def upload_product_directly(json_file_path):
     """Upload a single product JSON file to Strapi"""
     
     print(f"📤 Uploading {json_file_path}...")
     
-    # Read the JSON file
+    # Read the JSON file; it is parsed only to check it is valid, and the
+    # original bytes are sent as the request body without re-encoding
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            payload = json.load(f)
+        with open(json_file_path, 'rb') as f:
+            body = f.read()
+        loads(body)
     except Exception as e:
         print(f"❌ Error reading {json_file_path}: {e}")
         return False
     
-    # Prepare headers
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    # Make the POST request
-    try:
-        response = requests.post(STRAPI_URL, json=payload, headers=headers)
-        
-        if response.status_code in (200, 201):
-            result = response.json()
-            product_id = result["data"]["id"]
-            product_name = result["data"]["attributes"]["name"]
-            print(f"✅ Successfully created product: {product_name} (ID: {product_id})")
-            return True
-        else:
-            print(f"❌ Error {response.status_code}: {response.text}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Network error: {e}")
-        return False
+    return create_product(SESSION, STRAPI_URL, body, json_file_path)
 
 def main():
     print("🚀 Direct Product Uploader")
@@ -73,16 +58,17 @@ def main():
     
     print("\n" + "=" * 40)
     
-    # Upload each product
-    success_count = 0
+    # Upload the products that exist concurrently
+    existing_files = []
     for product_file in products_to_upload:
         if os.path.exists(product_file):
-            success = upload_product_directly(product_file)
-            if success:
-                success_count += 1
+            existing_files.append(product_file)
         else:
             print(f"❌ File not found: {product_file}")
     
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        success_count = sum(executor.map(upload_product_directly, existing_files))
+    
     print(f"\n🎉 Upload complete! {success_count}/{len(products_to_upload)} products uploaded successfully.")
 
 if __name__ == "__main__":
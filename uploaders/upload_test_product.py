@@ -2,16 +2,20 @@
 """
 Upload test product to production Strapi
 """
-import json
 import os
-import requests
+import sys
 from dotenv import load_dotenv
+from _http import make_session
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # repository root, for utils
+from utils.jsonio import dumps, iter_items
 
 load_dotenv()
 
 STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 PRODUCTION_URL = "https://adminpanel.lets-med.com/api/medical-products"
 
+SESSION = make_session(pool_size=1)
+
 def upload_test_product():
     """Upload the BLOOD EXTRACTION TUBES' HOLDERS product to production"""
     
@@ -22,22 +26,19 @@ def upload_test_product():
         print("❌ STRAPI_TOKEN environment variable not set")
         return False
     
-    # Load the specific product from products.json
+    # Stream products.json and stop at the BLOOD EXTRACTION TUBES' HOLDERS
+    # product instead of loading the whole catalog
+    test_product = None
     try:
-        with open('products.json', 'r', encoding='utf-8') as f:
-            products = json.load(f)
+        for product in iter_items('products.json'):
+            product_name = product.get('data', {}).get('name', '')
+            if "BLOOD EXTRACTION TUBES" in product_name and "HOLDERS" in product_name:
+                test_product = product
+                break
     except Exception as e:
         print(f"❌ Error reading products.json: {e}")
         return False
     
-    # Find the BLOOD EXTRACTION TUBES' HOLDERS product
-    test_product = None
-    for product in products:
-        product_name = product.get('data', {}).get('name', '')
-        if "BLOOD EXTRACTION TUBES" in product_name and "HOLDERS" in product_name:
-            test_product = product
-            break
-    
     if not test_product:
         print("❌ Test product not found in products.json")
         return False
@@ -50,17 +51,11 @@ def upload_test_product():
     print(f"📝 Description: {test_product['data']['description'][:100]}...")
     print()
     
-    # Prepare headers
-    headers = {
-        "Authorization": f"Bearer {STRAPI_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     print("📤 Uploading to production Strapi...")
     print(f"🌐 URL: {PRODUCTION_URL}")
     
     try:
-        response = requests.post(PRODUCTION_URL, json=test_product, headers=headers)
+        response = SESSION.post(PRODUCTION_URL, data=dumps(test_product))
         
         print(f"📊 Response Status: {response.status_code}")
         
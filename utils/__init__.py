@@ -1,17 +1,40 @@
 """
 Utils package for medical product processing.
 
-This package contains utility modules for Strapi API operations
-and JSON diff functionality.
+This package contains utility modules for Strapi API operations,
+JSON diff functionality and JSON file I/O.
+
+The Strapi and diff helpers are imported on first use, so scripts that only
+need utils.jsonio do not load the HTTP client or rich.
 """
 
-from .strapi import find_by_name, find_by_reference, upsert_product, delete_product
-from .diff import print_diff
+import importlib
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "find_by_name": ".strapi",
+    "find_by_reference": ".strapi",
+    "find_many_by_reference": ".strapi",
+    "upsert_product": ".strapi",
+    "upsert_many": ".strapi",
+    "delete_product": ".strapi",
+    "print_diff": ".diff",
+}
 
 __all__ = [
     "find_by_name",
     "find_by_reference",
-    "upsert_product", 
+    "find_many_by_reference",
+    "upsert_product",
+    "upsert_many",
     "delete_product",
     "print_diff"
-] 
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
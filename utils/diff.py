@@ -7,12 +7,27 @@ between JSON objects using the rich library for colored output.
 
 from typing import Dict, Any
 from rich.console import Console
+from rich.style import Style
 from rich.table import Table
-from rich.text import Text
 
 # Initialize console for output
 console = Console()
 
+# Column styles parsed once rather than from strings on every diff
+_FIELD_STYLE = Style.parse("cyan")
+_REMOTE_STYLE = Style.parse("red")
+_LOCAL_STYLE = Style.parse("green")
+
+_NONE_MARKUP = "[dim]None[/dim]"
+
+def _make_table() -> Table:
+    """Create an empty diff table; Rich tables cannot be reused between prints."""
+    table = Table(title="JSON Diff")
+    table.add_column("Field", style=_FIELD_STYLE, no_wrap=True)
+    table.add_column("Remote", style=_REMOTE_STYLE)
+    table.add_column("Local", style=_LOCAL_STYLE)
+    return table
+
 def print_diff(remote: Dict[str, Any], local: Dict[str, Any]) -> None:
     """
     Print a side-by-side diff of two JSON dictionaries.
@@ -25,37 +40,28 @@ def print_diff(remote: Dict[str, Any], local: Dict[str, Any]) -> None:
         remote: Remote/existing JSON data
         local: Local/new JSON data
     """
-    # Create table for comparison
-    table = Table(title="JSON Diff")
-    table.add_column("Field", style="cyan", no_wrap=True)
-    table.add_column("Remote", style="red")
-    table.add_column("Local", style="green")
-    
-    # Get all unique keys
-    all_keys = set(remote.keys()) | set(local.keys())
-    
-    # Track if we have any differences
-    has_differences = False
-    
-    for key in sorted(all_keys):
-        remote_val = remote.get(key)
-        local_val = local.get(key)
-        
-        # Only show rows where values differ
+    # One pass over each dict instead of building and sorting the union of
+    # keys; a key missing on one side compares as None, as before
+    rows = []
+    local_get = local.get
+    for key, remote_val in remote.items():
+        local_val = local_get(key)
         if remote_val != local_val:
-            has_differences = True
-            
-            # Format values for display
-            remote_str = _format_value(remote_val)
-            local_str = _format_value(local_val)
-            
-            # Add row to table
-            table.add_row(key, remote_str, local_str)
+            rows.append((key, remote_val, local_val))
+    for key, local_val in local.items():
+        if key not in remote and local_val is not None:
+            rows.append((key, None, local_val))
+    rows.sort(key=lambda row: row[0])
     
-    if has_differences:
-        console.print(table)
-    else:
+    if not rows:
         console.print("[green]No differences found[/green]")
+        return
+    
+    # Only rows where values differ are shown
+    table = _make_table()
+    for key, remote_val, local_val in rows:
+        table.add_row(key, _format_value(remote_val), _format_value(local_val))
+    console.print(table)
 
 def _format_value(value: Any) -> str:
     """
@@ -68,7 +74,7 @@ def _format_value(value: Any) -> str:
         Formatted string representation
     """
     if value is None:
-        return "[dim]None[/dim]"
+        return _NONE_MARKUP
     elif isinstance(value, (dict, list)):
         # For complex types, show a summary
         if isinstance(value, dict):
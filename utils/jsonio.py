@@ -0,0 +1,102 @@
+"""
+JSON helpers shared by the extractor, core and uploader scripts.
+
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise, so callers get the same bytes-in/bytes-out API either way.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; iter_items() then parses the whole file
+    ijson = None
+
+
+def loads(data):
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=False, default=None):
+    """
+    Serialize obj to UTF-8 JSON bytes, 2-space indented if indent is set.
+    
+    default is called for objects neither encoder supports natively, as in
+    json.dumps (orjson already handles dataclasses on its own).
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=default).encode("utf-8")
+
+
+def load_file(path):
+    """Read and parse a JSON file"""
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+
+def iter_items(path):
+    """
+    Yield the elements of the top-level JSON array in path one at a time.
+    
+    With ijson installed only the element being yielded is held in memory, so
+    callers that stop early never build the rest of the file.
+    """
+    if ijson is None:
+        yield from load_file(path)
+        return
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def dump_lines(records):
+    """Encode records as JSON Lines: one compact object per line, as bytes"""
+    return b"".join(dumps(record) + b"\n" for record in records)
+
+
+def load_lines(path):
+    """Read a JSON Lines file into a list, skipping blank lines"""
+    with open(path, 'rb') as f:
+        return [loads(line) for line in f if line.strip()]
+
+
+def dump_file(obj, path, indent=True, default=None):
+    """Write obj to path as JSON in a single write"""
+    Path(path).write_bytes(dumps(obj, indent=indent, default=default))
+
+
+def dump_files(items, indent=True, max_workers=8):
+    """
+    Write many (obj, path) pairs, one JSON file each.
+    
+    Everything is encoded up front, then the files are written from a thread
+    pool so the open/write/close calls overlap.
+    
+    Returns:
+        list: the paths written, in input order
+    """
+    payloads = [(Path(path), dumps(obj, indent=indent)) for obj, path in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda pair: pair[0].write_bytes(pair[1]), payloads))
+    return [str(path) for path, _ in payloads]
+
+
+# Spaces and slashes in product names become '_' in output filenames
+_FILENAME_SAFE = str.maketrans({' ': '_', '/': '_'})
+
+
+def filename_safe(name):
+    """Make a product name usable as part of an output filename"""
+    return name.translate(_FILENAME_SAFE)
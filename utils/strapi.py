@@ -8,10 +8,20 @@ error handling with timeouts and retries.
 """
 
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus, urlencode
 import requests
-from typing import Dict, Optional, Any
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Any
 from dotenv import load_dotenv
 
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+except ImportError:  # httpx/h2 are optional; fall back to requests over HTTP/1.1
+    httpx = None
+
 # Load environment variables
 load_dotenv()
 
@@ -21,39 +31,93 @@ STRAPI_TOKEN = os.getenv("STRAPI_TOKEN")
 
 # Request configuration
 TIMEOUT = 5
-MAX_RETRIES = 3
+MAX_RETRIES = int(os.getenv("STRAPI_MAX_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("STRAPI_RETRY_BACKOFF", "0.5"))  # seconds, doubled per attempt
+RETRY_BACKOFF_CAP = 30
+MAX_PAGE_SIZE = 100  # Strapi's default maxLimit for pagination[pageSize]
+UPSERT_WORKERS = 5  # Concurrent create/update requests in upsert_many
+
+# Lookup URLs with the bracketed filter key already encoded; only the value is
+# appended per call
+_PRODUCTS_URL = f"{STRAPI_URL}/api/medical-products"
+_NAME_QUERY_URL = f"{_PRODUCTS_URL}?{urlencode({'filters[name][$eq]': ''})}"
+_REFERENCE_QUERY_URL = f"{_PRODUCTS_URL}?{urlencode({'filters[referenceString][$eq]': ''})}"
+
+# Strapi did not act on these, so they are retried for every method
+RETRY_STATUSES = (429, 503)
+# Server/gateway errors are only retried where repeating the request is safe
+IDEMPOTENT_RETRY_STATUSES = (500, 502, 504)
+IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+
+# Headers for Strapi API requests; STRAPI_TOKEN does not change after import
+_HEADERS: Dict[str, str] = {"Content-Type": "application/json"}
+if STRAPI_TOKEN:
+    _HEADERS["Authorization"] = f"Bearer {STRAPI_TOKEN}"
 
-def _get_headers() -> Dict[str, str]:
-    """Get headers for Strapi API requests."""
-    headers = {"Content-Type": "application/json"}
-    if STRAPI_TOKEN:
-        headers["Authorization"] = f"Bearer {STRAPI_TOKEN}"
-    return headers
+# Shared session: keeps the connection to Strapi open between calls and sends
+# the auth headers on every request. With httpx installed it speaks HTTP/2, so
+# concurrent calls are multiplexed over one connection instead of opening one
+# HTTP/1.1 connection each.
+if httpx is not None:
+    _SESSION = httpx.Client(http2=True, headers=_HEADERS)
+    # Failures where the request may not have reached Strapi; worth retrying
+    _RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError)
+    _REQUEST_ERRORS = (httpx.HTTPError, httpx.InvalidURL)
+else:
+    _SESSION = requests.Session()
+    _SESSION.headers.update(_HEADERS)
+    _RETRYABLE_ERRORS = (requests.exceptions.Timeout, requests.exceptions.ConnectionError)
+    _REQUEST_ERRORS = requests.exceptions.RequestException
+
+def _retry_delay(attempt: int, response: Optional[requests.Response] = None) -> float:
+    """Seconds to wait before retry number attempt + 1, honouring Retry-After."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    # Exponential backoff with jitter so concurrent clients do not retry in step
+    return min(RETRY_BACKOFF_CAP, RETRY_BACKOFF * 2 ** attempt) + random.uniform(0, RETRY_BACKOFF)
 
 def _make_request(method: str, url: str, **kwargs) -> Optional[requests.Response]:
     """
     Make a request to the Strapi API with retries and timeout.
     
+    Timeouts, connection errors and 429/503 responses are retried with
+    exponential backoff; 500/502/504 are also retried for GET, PUT and DELETE.
+    
     Args:
         method: HTTP method (GET, POST, PUT, DELETE)
         url: Full URL to request
-        **kwargs: Additional arguments to pass to requests
+        **kwargs: Additional arguments for the session's request() (params, json, ...)
         
     Returns:
-        Response object or None if all retries failed
+        Response object (the last one if retries ran out) or None if the
+        request could not be sent
     """
     kwargs.setdefault("timeout", TIMEOUT)
-    kwargs.setdefault("headers", _get_headers())
+    retry_statuses = RETRY_STATUSES
+    if method.upper() in IDEMPOTENT_METHODS:
+        retry_statuses += IDEMPOTENT_RETRY_STATUSES
     
     for attempt in range(MAX_RETRIES):
+        last_attempt = attempt == MAX_RETRIES - 1
         try:
-            response = requests.request(method, url, **kwargs)
-            return response
-        except requests.exceptions.RequestException as e:
-            if attempt == MAX_RETRIES - 1:
+            response = _SESSION.request(method, url, **kwargs)
+        except _RETRYABLE_ERRORS as e:
+            if last_attempt:
                 print(f"Error making request to {url}: {e}")
                 return None
+            time.sleep(_retry_delay(attempt))
+            continue
+        except _REQUEST_ERRORS as e:
+            # e.g. an invalid URL; sending it again will not help
+            print(f"Error making request to {url}: {e}")
+            return None
+        
+        if response.status_code in retry_statuses and not last_attempt:
+            time.sleep(_retry_delay(attempt, response))
             continue
+        return response
     
     return None
 
@@ -67,10 +131,7 @@ def find_by_name(name: str) -> Optional[Dict[str, Any]]:
     Returns:
         Product data dictionary if found, None otherwise
     """
-    url = f"{STRAPI_URL}/api/medical-products"
-    params = {"filters[name][$eq]": name}
-    
-    response = _make_request("GET", url, params=params)
+    response = _make_request("GET", _NAME_QUERY_URL + quote_plus(name))
     if not response or response.status_code != 200:
         return None
     
@@ -90,10 +151,7 @@ def find_by_reference(reference_string: str) -> Optional[Dict[str, Any]]:
     Returns:
         Product data dictionary if found, None otherwise
     """
-    url = f"{STRAPI_URL}/api/medical-products"
-    params = {"filters[referenceString][$eq]": reference_string}
-    
-    response = _make_request("GET", url, params=params)
+    response = _make_request("GET", _REFERENCE_QUERY_URL + quote_plus(reference_string))
     if not response or response.status_code != 200:
         return None
     
@@ -103,6 +161,50 @@ def find_by_reference(reference_string: str) -> Optional[Dict[str, Any]]:
     
     return None
 
+def find_many_by_reference(reference_strings: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+    """
+    Find many medical products by referenceString with one query per
+    MAX_PAGE_SIZE references instead of one per product.
+    
+    Args:
+        reference_strings: Product reference strings to search for
+        
+    Returns:
+        Tuple of (found, unresolved): found maps each referenceString that
+        exists in Strapi to its product data; unresolved holds the references
+        whose lookup failed, so it is unknown whether they exist
+    """
+    url = _PRODUCTS_URL
+    refs = list(dict.fromkeys(reference_strings))
+    found: Dict[str, Dict[str, Any]] = {}
+    unresolved: Set[str] = set()
+    
+    for start in range(0, len(refs), MAX_PAGE_SIZE):
+        chunk = refs[start:start + MAX_PAGE_SIZE]
+        filters = [(f"filters[referenceString][$in][{i}]", ref) for i, ref in enumerate(chunk)]
+        
+        # Strapi may hold several products per reference, so a chunk can
+        # match more than one page; read them all
+        page = 1
+        while True:
+            params = filters + [("pagination[page]", page), ("pagination[pageSize]", MAX_PAGE_SIZE)]
+            response = _make_request("GET", url, params=params)
+            if not response or response.status_code != 200:
+                unresolved.update(ref for ref in chunk if ref not in found)
+                break
+            
+            body = response.json()
+            for item in body.get("data") or []:
+                # Like find_by_reference, keep the first match for each reference
+                found.setdefault(item["attributes"]["referenceString"], item)
+            
+            page_count = body.get("meta", {}).get("pagination", {}).get("pageCount", page)
+            if page >= page_count:
+                break
+            page += 1
+    
+    return found, unresolved
+
 def upsert_product(payload: Dict[str, Any], existing: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
     """
     Create or update a medical product in Strapi.
@@ -120,7 +222,7 @@ def upsert_product(payload: Dict[str, Any], existing: Optional[Dict[str, Any]] =
     if existing:
         # Update existing product
         product_id = existing["id"]
-        url = f"{STRAPI_URL}/api/medical-products/{product_id}"
+        url = f"{_PRODUCTS_URL}/{product_id}"
         
         response = _make_request("PUT", url, json=payload)
         if response and response.status_code in (200, 201):
@@ -132,7 +234,7 @@ def upsert_product(payload: Dict[str, Any], existing: Optional[Dict[str, Any]] =
             return None
     else:
         # Create new product
-        url = f"{STRAPI_URL}/api/medical-products"
+        url = _PRODUCTS_URL
         
         response = _make_request("POST", url, json=payload)
         if response and response.status_code in (200, 201):
@@ -144,6 +246,36 @@ def upsert_product(payload: Dict[str, Any], existing: Optional[Dict[str, Any]] =
         else:
             return None
 
+def upsert_many(payloads: List[Dict[str, Any]], max_workers: int = UPSERT_WORKERS) -> List[Optional[Dict[str, Any]]]:
+    """
+    Create or update many medical products, matched by referenceString.
+    
+    Existing products are looked up with find_many_by_reference (one GET per
+    MAX_PAGE_SIZE products) instead of a find_by_reference per product, and
+    the creates/updates are then sent concurrently, so N products cost about
+    1 + N / max_workers round-trips rather than 2N serial ones.
+    
+    Args:
+        payloads: Product data to create/update, each {"data": {...}}
+        max_workers: Number of create/update requests in flight at once
+        
+    Returns:
+        Result of upsert_product for each payload, in input order; None for
+        payloads whose existing product could not be looked up, which are
+        skipped rather than created to avoid duplicating a product
+    """
+    references = [payload.get("data", {}).get("referenceString") for payload in payloads]
+    existing, unresolved = find_many_by_reference(ref for ref in references if ref)
+    
+    def upsert(payload: Dict[str, Any], ref: Optional[str]) -> Optional[Dict[str, Any]]:
+        if ref in unresolved:
+            print(f"⚠️  skipped {ref}: could not check whether it already exists in Strapi")
+            return None
+        return upsert_product(payload, existing.get(ref) if ref else None)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(upsert, payloads, references))
+
 def delete_product(product_id: int) -> bool:
     """
     Delete a medical product from Strapi.
@@ -154,7 +286,7 @@ def delete_product(product_id: int) -> bool:
     Returns:
         True if deletion was successful, False otherwise
     """
-    url = f"{STRAPI_URL}/api/medical-products/{product_id}"
+    url = f"{_PRODUCTS_URL}/{product_id}"
     
     response = _make_request("DELETE", url)
     if response and response.status_code in (200, 204):